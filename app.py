@@ -1,14 +1,24 @@
 import os
+import json
 import uuid
 import logging
 import matplotlib
 matplotlib.use('Agg')  # ✅ Use non-GUI backend
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from wordcloud import WordCloud
-from flask import Flask, render_template, request, redirect, url_for, session
-
-from src.utils.scrapper import get_youtube_comments
-from src.utils.inference import load_model_and_artifacts, predict_sentiment
+from flask import Flask, Response, render_template, request, redirect, url_for, session, jsonify, g
+
+from src.utils.scrapper import fetch_comment_threads, extract_video_id
+from src.utils.inference import predict_sentiment, predict_cleaned
+from src.utils.batching import MicroBatcher
+from src.utils.model_reloader import ModelReloader, BundleSource, RegistrySource
+from src.utils.prediction_cache import PredictionCache
+from src.utils.result_store import ResultStore
+from src.utils.jobs import JobManager, JobQueueFull, ProgressRelay, DONE, FAILED
+from src.utils.video_store import VideoStore, SENTIMENTS
+from src.utils.single_flight import SingleFlight
+from src.utils.preprocessing import lemma_cache
+from src.utils.nltk_resources import warm_wordnet
 
 # Template/static folder paths
 base_dir = os.path.dirname(__file__)
@@ -31,14 +41,76 @@ logging.basicConfig(
     ]
 )
 
-# Load model and vectorizer
+# Load WordNet now rather than on the first user request
+warm_wordnet()
+
+
+def make_batcher(model, vectorizer):
+    """Micro-batch concurrent predictions (tune with BATCH_MAX_SIZE / BATCH_MAX_WAIT_MS); one per model."""
+    return MicroBatcher(
+        lambda cleaned: predict_cleaned(cleaned, model, vectorizer),
+        max_batch_size=int(os.environ.get("BATCH_MAX_SIZE", 512)),
+        max_wait_ms=float(os.environ.get("BATCH_MAX_WAIT_MS", 5)),
+    )
+
+
+# Load model and vectorizer: from a serving bundle (SERVING_BUNDLE, no MLflow) or the registry.
+# New versions are polled for every MODEL_RELOAD_INTERVAL seconds (0 disables) and hot-swapped.
 try:
-    model, vectorizer = load_model_and_artifacts("my_model")
-    logging.info("✅ Model and vectorizer loaded.")
+    bundle_path = os.environ.get("SERVING_BUNDLE")
+    source = BundleSource(bundle_path) if bundle_path else RegistrySource("my_model")
+    reloader = ModelReloader(
+        source,
+        make_batcher=make_batcher,
+        poll_interval=float(os.environ.get("MODEL_RELOAD_INTERVAL", 30)),
+    )
+    reloader.load_initial()
+    # Under the pre-fork server (gunicorn.conf.py) each worker starts its own poller after fork
+    if os.environ.get("APP_PREFORK") != "1":
+        reloader.start()
+    logging.info(f"✅ Model {reloader.current.version} and vectorizer loaded.")
 except Exception as e:
     logging.exception("❌ Could not load model/vectorizer.")
     raise e
 
+# Cache predictions by cleaned text + model version (PREDICTION_CACHE_DB enables SQLite persistence)
+prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get("PREDICTION_CACHE_SIZE", 100000)),
+    ttl_seconds=float(os.environ.get("PREDICTION_CACHE_TTL", 24 * 3600)),
+    sqlite_path=os.environ.get("PREDICTION_CACHE_DB"),
+)
+
+# Analysis results live server-side; the session only carries the result ID.
+# RESULT_STORE_DB adds a SQLite file so all worker processes can serve any result
+# (gunicorn.conf.py sets one by default).
+result_store = ResultStore(
+    max_entries=int(os.environ.get("RESULT_STORE_SIZE", 1000)),
+    ttl_seconds=float(os.environ.get("RESULT_STORE_TTL", 3600)),
+    sqlite_path=os.environ.get("RESULT_STORE_DB"),
+)
+RESULTS_PER_PAGE = int(os.environ.get("RESULTS_PER_PAGE", 50))
+
+# Fetched comments and their sentiment per video, refreshed incrementally on repeat
+# analyses; VIDEO_STORE_DB keeps them on disk and shares them between worker processes
+# (gunicorn.conf.py sets one by default).
+video_store = VideoStore(os.environ.get("VIDEO_STORE_DB", ":memory:"))
+
+# Background analyses (POST /jobs) run on JOB_WORKERS threads with at most JOB_QUEUE_SIZE
+# queued or running; JOB_STORE_DB shares job state between worker processes
+# (gunicorn.conf.py sets one by default).
+jobs = JobManager(
+    max_workers=int(os.environ.get("JOB_WORKERS", 4)),
+    max_pending=int(os.environ.get("JOB_QUEUE_SIZE", 64)),
+    ttl_seconds=float(os.environ.get("RESULT_STORE_TTL", 3600)),
+    sqlite_path=os.environ.get("JOB_STORE_DB"),
+)
+
+# Concurrent analyses of the same video, comment count and model run once and share the result
+analysis_flights = SingleFlight(timeout=float(os.environ.get("ANALYSIS_TIMEOUT", 60)))
+
+# Comments scored per step of a job, i.e. how often partial counts are reported
+JOB_CHUNK_SIZE = int(os.environ.get("JOB_CHUNK_SIZE", 100))
+
 
 def generate_wordcloud(text_list):
     try:
@@ -46,12 +118,13 @@ def generate_wordcloud(text_list):
         filename = f"{uuid.uuid4().hex}.png"
         filepath = os.path.join(wordcloud_dir, filename)
 
-        plt.figure(figsize=(10, 5))
-        plt.imshow(wordcloud, interpolation='bilinear')
-        plt.axis('off')
-        plt.tight_layout()
-        plt.savefig(filepath, format='png')
-        plt.close()
+        # A standalone Figure instead of pyplot's global state: jobs render concurrently
+        fig = Figure(figsize=(10, 5))
+        ax = fig.add_subplot()
+        ax.imshow(wordcloud, interpolation='bilinear')
+        ax.axis('off')
+        fig.tight_layout()
+        fig.savefig(filepath, format='png')
 
         return filename
     except Exception as e:
@@ -63,41 +136,144 @@ def map_prediction(value):
     return "Positive" if value == 1 else "Negative" if value == -1 else "Neutral"
 
 
+def analyze_video(url, max_comments, job=None, fetch_comments=None):
+    """
+    Fetch, score and render the newest comments of one video; returns the
+    result ID and model version.
+
+    Comments and their sentiment are kept per video in video_store. A repeat
+    analysis fetches only comments newer than the stored high-water mark and
+    scores just those; everything is fetched again only when more comments
+    are asked for than are stored, and rescored when the model changed.
+    With a Job (or a ProgressRelay), the stage, progress and running
+    sentiment counts are reported as comments are scored. fetch_comments(video_id, max_comments,
+    newer_than=None) defaults to the YouTube API (fetch_comment_threads) and
+    can be replaced by any other comment source.
+    """
+    report = job.update if job is not None else (lambda **fields: None)
+    fetch_comments = fetch_comments or fetch_comment_threads
+    video_id = extract_video_id(url)
+    if not video_id:
+        raise ValueError("Invalid YouTube video URL or ID.")
+    max_comments = max(1, max_comments)
+
+    with reloader.lease() as serving:
+        video = video_store.get(video_id)
+        incremental = video is not None and (video["complete"] or video["comment_count"] >= max_comments)
+
+        report(stage="fetching")
+        if incremental:
+            fetched, exhausted = fetch_comments(video_id, max_comments, newer_than=video["high_water"])
+        else:
+            fetched, exhausted = fetch_comments(video_id, max_comments)
+        if not fetched and video is None:
+            raise ValueError("No comments retrieved from the video.")
+
+        # Fetched comments that stop short of the stored ones leave a gap; start over from them
+        gap = video is not None and not exhausted and fetched[-1]["published_at"] > video["high_water"]
+        rescore = video is not None and not gap and video["model_version"] != serving.version
+        known = video_store.known_ids(video_id, [c["id"] for c in fetched]) if video is not None else set()
+        to_score = [c for c in fetched if c["id"] not in known]
+        if rescore:
+            to_score += video_store.newest(video_id)
+        logging.info(
+            f"✅ Retrieved {len(fetched)} comments for {video_id} "
+            f"({'incremental' if incremental else 'full'} fetch), {len(to_score)} to score."
+        )
+
+        # Stored comments that stay among the newest count towards the partial totals
+        sentiment_counts = dict.fromkeys(SENTIMENTS, 0)
+        if video is not None and not gap and not rescore:
+            for comment in video_store.newest(video_id, max(max_comments - len(to_score), 0)):
+                sentiment_counts[comment["sentiment"]] += 1
+
+        # Reported runs score in chunks so partial counts can be streamed (a job may join a
+        # POST's run at any time); unreported ones in one batch
+        chunk_size = JOB_CHUNK_SIZE if job is not None else max(len(to_score), 1)
+        report(stage="scoring", progress={"done": 0, "total": len(to_score)}, counts=dict(sentiment_counts))
+        scored = []
+        for start in range(0, len(to_score), chunk_size):
+            chunk = to_score[start:start + chunk_size]
+            raw_results = predict_sentiment(
+                [c["text"] for c in chunk], serving.model, serving.vectorizer,
+                batcher=serving.batcher, cache=prediction_cache, model_version=serving.version,
+            )
+            for comment, (_, pred) in zip(chunk, raw_results):
+                scored.append({**comment, "sentiment": map_prediction(pred)})
+                sentiment_counts[scored[-1]["sentiment"]] += 1
+            report(progress={"done": len(scored), "total": len(to_score)}, counts=dict(sentiment_counts))
+        model_version = serving.version
+
+    complete = (video["complete"] and not gap) if incremental else exhausted
+    video_store.merge(video_id, scored, model_version, complete, replace=gap or rescore)
+    video = video_store.get(video_id)
+    comments = video_store.newest(video_id, max_comments)
+    results = [(c["text"], c["sentiment"]) for c in comments]
+    if len(comments) == video["comment_count"]:
+        sentiment_counts = video["counts"]
+    else:
+        sentiment_counts = dict.fromkeys(SENTIMENTS, 0)
+        for _, sentiment in results:
+            sentiment_counts[sentiment] += 1
+    report(counts=dict(sentiment_counts))
+
+    # The same comments of a video render to the same word cloud
+    report(stage="rendering")
+    wordcloud_key = f"{len(comments)}:{video['high_water']}"
+    wordcloud_filename = video["wordcloud"] if video["wordcloud_key"] == wordcloud_key else None
+    if not wordcloud_filename or not os.path.exists(os.path.join(wordcloud_dir, wordcloud_filename)):
+        wordcloud_filename = generate_wordcloud([text for text, _ in results])
+        if wordcloud_filename:
+            video_store.set_wordcloud(video_id, wordcloud_key, wordcloud_filename)
+
+    result_id = result_store.put(results, sentiment_counts, wordcloud_filename, model_version=model_version)
+    return {"result_id": result_id, "model_version": model_version}
+
+
+def analysis_key(url, max_comments):
+    """Requests with the same key produce the same analysis."""
+    return (extract_video_id(url), max(1, max_comments), reloader.current.version)
+
+
+def analyze_shared(url, max_comments, job=None):
+    """
+    analyze_video, with concurrent requests for the same analysis_key waiting
+    on one run and sharing its result or error. Waiters give up after
+    ANALYSIS_TIMEOUT seconds; the run itself carries on for the others.
+    The run reports to a ProgressRelay, so a job that joins it, whether it
+    was started by a job or a plain POST, still gets stage, progress and counts.
+    """
+    relay = ProgressRelay(job)
+    return analysis_flights.do(
+        analysis_key(url, max_comments),
+        lambda: analyze_video(url, max_comments, job=relay),
+        context=relay,
+        join=(lambda leader: leader.attach(job)) if job is not None else None,
+    )
+
+
+def read_max_comments(form):
+    try:
+        return int(form.get("max_comments", 20))
+    except ValueError:
+        return 20
+
+
 @app.route("/", methods=["GET", "POST"])
 def index():
     if request.method == "POST":
         url = request.form.get("youtube_url")
-        try:
-            max_comments = int(request.form.get("max_comments", 20))
-        except ValueError:
-            max_comments = 20
+        max_comments = read_max_comments(request.form)
 
         logging.info(f"🔍 Processing URL: {url} | Max comments: {max_comments}")
 
         try:
-            comments = get_youtube_comments(url)
-            if not comments:
-                raise ValueError("No comments retrieved from the video.")
-
-            comments = comments[:max_comments]
-            logging.info(f"✅ Retrieved {len(comments)} comments.")
-
-            raw_results = predict_sentiment(comments, model, vectorizer)
-            results = [(comment, map_prediction(pred)) for comment, pred in raw_results]
+            analysis = analyze_shared(url, max_comments)
+            g.model_version = analysis["model_version"]
 
-            sentiments = [s for _, s in results]
-            sentiment_counts = {
-                "Positive": sentiments.count("Positive"),
-                "Negative": sentiments.count("Negative"),
-                "Neutral": sentiments.count("Neutral"),
-            }
-
-            wordcloud_filename = generate_wordcloud(comments)
-
-            # Store minimal data in session
-            session['results'] = results
-            session['sentiment_counts'] = sentiment_counts
-            session['wordcloud_filename'] = wordcloud_filename
+            # Only the result ID goes into the session cookie. Coalesced requests share
+            # a result, so replaced ones are left to expire rather than deleted.
+            session['result_id'] = analysis["result_id"]
 
             return redirect(url_for('results'))
 
@@ -108,24 +284,111 @@ def index():
     return render_template("index.html", show_results=False)
 
 
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    """Start an analysis in the background; progress is at /jobs/<id> and /jobs/<id>/events."""
+    form = request.get_json(silent=True) or request.form
+    url = form.get("youtube_url")
+    max_comments = read_max_comments(form)
+    if not url or not extract_video_id(url):
+        return jsonify({"error": "Invalid YouTube video URL or ID."}), 400
+
+    try:
+        job = jobs.submit(analyze_shared, key=analysis_key(url, max_comments), url=url, max_comments=max_comments)
+    except JobQueueFull as e:
+        logging.warning(f"⚠️ Rejected job for {url}: {e}")
+        return jsonify({"error": "Too many analyses in progress, try again shortly."}), 503, {"Retry-After": "5"}
+
+    logging.info(f"🔍 Queued job {job.id} for URL: {url} | Max comments: {max_comments}")
+    return jsonify({
+        "job_id": job.id,
+        "status_url": url_for("job_status", job_id=job.id),
+        "events_url": url_for("job_events", job_id=job.id),
+        "results_url": url_for("job_results", job_id=job.id),
+    }), 202
+
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    snapshot = jobs.get(job_id)
+    if snapshot is None:
+        return jsonify({"error": "Unknown job."}), 404
+    return jsonify(snapshot)
+
+
+@app.route("/jobs/<job_id>/events")
+def job_events(job_id):
+    """Server-Sent Events: one message per job update, the last one in state done or failed."""
+    if jobs.get(job_id) is None:
+        return jsonify({"error": "Unknown job."}), 404
+
+    def stream():
+        for snapshot in jobs.watch(job_id):
+            yield ": keep-alive\n\n" if snapshot is None else f"data: {json.dumps(snapshot)}\n\n"
+
+    return Response(stream(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.route("/jobs/<job_id>/results")
+def job_results(job_id):
+    """Attach a finished job's result to the session and show it."""
+    snapshot = jobs.get(job_id)
+    if snapshot is None:
+        return redirect(url_for("index"))
+    if snapshot["state"] == FAILED:
+        return render_template("index.html", error=snapshot["error"], show_results=False)
+    if snapshot["state"] != DONE:
+        return jsonify(snapshot), 409
+
+    session['result_id'] = snapshot["result"]["result_id"]
+    return redirect(url_for('results'))
+
+
 @app.route("/results")
 def results():
-    results = session.get('results')
-    sentiment_counts = session.get('sentiment_counts')
-    wordcloud_filename = session.get('wordcloud_filename')
+    page = request.args.get("page", 1, type=int)
+    per_page = min(request.args.get("per_page", RESULTS_PER_PAGE, type=int), 500)
+    stored = result_store.get_page(session.get('result_id'), page, per_page)
 
-    if not results:
+    if not stored:
         return redirect(url_for("index"))
+    g.model_version = stored['model_version']
 
+    wordcloud_filename = stored['wordcloud_filename']
     wordcloud_url = f"/static/wordclouds/{wordcloud_filename}" if wordcloud_filename else None
 
     return render_template("index.html",
-                           results=results,
-                           sentiment_counts=sentiment_counts,
+                           results=stored['results'],
+                           total=stored['total'],
+                           page=stored['page'],
+                           pages=stored['pages'],
+                           per_page=stored['per_page'],
+                           sentiment_counts=stored['sentiment_counts'],
                            wordcloud_img_url=wordcloud_url,
                            show_results=True)
 
 
+@app.route("/stats")
+def stats():
+    return jsonify({
+        "model": reloader.stats(),
+        "batching": reloader.current.batcher.stats.snapshot(),
+        "prediction_cache": prediction_cache.stats(),
+        "result_store": result_store.stats(),
+        "jobs": jobs.stats(),
+        "video_store": video_store.stats(),
+        "single_flight": analysis_flights.stats(),
+        "lemma_cache": lemma_cache.stats(),
+    })
+
+
+@app.after_request
+def add_model_version(response):
+    """Tag every response with the model version that served it (else the current one)."""
+    response.headers["X-Model-Version"] = g.get("model_version") or reloader.current.version
+    return response
+
+
 @app.route("/clear", methods=["POST"])
 def clear_results():
     session.clear()
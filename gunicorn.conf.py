@@ -0,0 +1,52 @@
+# gunicorn.conf.py
+#
+# Pre-fork serving: gunicorn -c gunicorn.conf.py app:app
+#
+# The master imports app.py once (model, vectorizer, NLTK data and lemma
+# table) and forks the workers from it, so they share those pages
+# copy-on-write instead of each loading its own copy.
+
+import gc
+import os
+import tempfile
+import multiprocessing
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8080)}"
+preload_app = True
+
+# Worker processes, and request threads per worker (they share the worker's micro-batcher)
+workers = int(os.environ.get("WEB_WORKERS", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.environ.get("WEB_THREADS", 4))
+
+# Recycle each worker after this many requests (jittered so they do not restart together);
+# a replacement is forked from the already-loaded master, so it starts in milliseconds
+max_requests = int(os.environ.get("WEB_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.environ.get("WEB_MAX_REQUESTS_JITTER", 100))
+timeout = int(os.environ.get("WEB_TIMEOUT", 120))
+
+# app.py leaves starting the model reload poller to post_fork
+os.environ["APP_PREFORK"] = "1"
+
+# Workers do not share memory, and a request may land on any of them: state that has to
+# outlive one request lives in SQLite files under APP_STATE_DIR unless configured otherwise
+state_dir = os.environ.get("APP_STATE_DIR", os.path.join(tempfile.gettempdir(), "youtube_sentiment"))
+os.makedirs(state_dir, exist_ok=True)
+os.environ.setdefault("RESULT_STORE_DB", os.path.join(state_dir, "results.db"))
+os.environ.setdefault("JOB_STORE_DB", os.path.join(state_dir, "jobs.db"))
+os.environ.setdefault("VIDEO_STORE_DB", os.path.join(state_dir, "videos.db"))
+
+# No collections in the master while the app loads; they would only dirty pages the workers share
+gc.disable()
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far to the permanent generation: the workers'
+    # collections then never touch (and so never copy) those objects
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    gc.enable()
+    import app
+    app.reloader.after_fork()
@@ -4,6 +4,7 @@ import os
 from sklearn.model_selection import train_test_split
 import yaml
 import logging
+from src.utils.data_io import data_file, read_frame, write_frame, FrameWriter
 
 # Logging configuration
 logger = logging.getLogger('data_ingestion')
@@ -40,9 +41,9 @@ def load_params(params_path: str) -> dict:
         raise
 
 def load_data(data_url: str) -> pd.DataFrame:
-    """Load data from a CSV file."""
+    """Load data from a CSV or Parquet file."""
     try:
-        df = pd.read_csv(data_url)
+        df = read_frame(data_url)
         logger.debug('Data loaded from %s', data_url)
         return df
     except pd.errors.ParserError as e:
@@ -71,7 +72,7 @@ def preprocess_data(df: pd.DataFrame) -> pd.DataFrame:
         logger.error('Unexpected error during preprocessing: %s', e)
         raise
 
-def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str) -> None:
+def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str, data_format: str = 'csv') -> None:
     """Save the train and test datasets, creating the raw folder if it doesn't exist."""
     try:
         raw_data_path = os.path.join(data_path, 'raw')
@@ -80,22 +81,86 @@ def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str)
         os.makedirs(raw_data_path, exist_ok=True)
         
         # Save the train and test data
-        train_data.to_csv(os.path.join(raw_data_path, "train.csv"), index=False)
-        test_data.to_csv(os.path.join(raw_data_path, "test.csv"), index=False)
+        write_frame(train_data, data_file(raw_data_path, "train", data_format))
+        write_frame(test_data, data_file(raw_data_path, "test", data_format))
         
         logger.debug('Train and test data saved to %s', raw_data_path)
     except Exception as e:
         logger.error('Unexpected error occurred while saving the data: %s', e)
         raise
 
+def _row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    Content hash per row, stable across chunks: numeric columns are hashed as
+    float64 so a column inferred as int in one chunk and float in another
+    still hashes the same.
+    """
+    normalized = df.apply(
+        lambda col: col.astype('float64') if pd.api.types.is_numeric_dtype(col) else col.astype(str)
+    )
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+
+
+def ingest_streaming(data_url: str, data_path: str, test_size: float, chunk_size: int,
+                     data_format: str = 'csv') -> None:
+    """
+    Out-of-core ingestion: stream the source CSV in chunks, drop missing,
+    duplicate and empty rows, and append each row to the train or test file.
+
+    Rows are assigned to the test split by their content hash, so the split
+    is deterministic without holding the corpus in memory. Only the 8-byte
+    row hashes used for de-duplication grow with the corpus.
+    """
+    try:
+        raw_data_path = os.path.join(data_path, 'raw')
+        os.makedirs(raw_data_path, exist_ok=True)
+
+        seen = set()
+        test_buckets = int(round(test_size * 10000))
+
+        with FrameWriter(data_file(raw_data_path, "train", data_format)) as train_writer, \
+                FrameWriter(data_file(raw_data_path, "test", data_format)) as test_writer:
+            for chunk in pd.read_csv(data_url, chunksize=chunk_size):
+                chunk = chunk.dropna()
+                hashes = _row_hashes(chunk)
+
+                # Keep the first occurrence of each row across all chunks
+                unique = np.zeros(len(chunk), dtype=bool)
+                for i, row_hash in enumerate(hashes):
+                    if row_hash not in seen:
+                        seen.add(row_hash)
+                        unique[i] = True
+                chunk, hashes = chunk[unique], hashes[unique]
+
+                non_empty = (chunk['clean_comment'].str.strip() != '').to_numpy()
+                chunk, hashes = chunk[non_empty], hashes[non_empty]
+
+                is_test = (hashes % 10000) < test_buckets
+                test_writer.write(chunk[is_test])
+                train_writer.write(chunk[~is_test])
+
+        logger.debug('Streamed %d train and %d test rows to %s', train_writer.rows, test_writer.rows, raw_data_path)
+    except Exception as e:
+        logger.error('Unexpected error during streaming ingestion: %s', e)
+        raise
+
+
 def main():
     try:
         # Load parameters from the params.yaml in the root directory
         params = load_params(params_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../params.yaml'))
         test_size = params['data_ingestion']['test_size']
-        
+        data_format = params['data_io']['format']
+        data_url = 'https://raw.githubusercontent.com/Himanshu-1703/reddit-sentiment-analysis/refs/heads/main/data/reddit.csv'
+        data_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../data')
+
+        # Stream the source in bounded chunks instead of loading it whole
+        if params['streaming']['enabled']:
+            ingest_streaming(data_url, data_path, test_size, params['streaming']['chunk_size'], data_format)
+            return
+
         # Load data from the specified URL
-        df = load_data(data_url='https://raw.githubusercontent.com/Himanshu-1703/reddit-sentiment-analysis/refs/heads/main/data/reddit.csv')
+        df = load_data(data_url=data_url)
         
         # Preprocess the data
         final_df = preprocess_data(df)
@@ -104,7 +169,7 @@ def main():
         train_data, test_data = train_test_split(final_df, test_size=test_size, random_state=42)
         
         # Save the split datasets and create the raw folder if it doesn't exist
-        save_data(train_data, test_data, data_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../data'))
+        save_data(train_data, test_data, data_path=data_path, data_format=data_format)
         
     except Exception as e:
         logger.error('Failed to complete the data ingestion process: %s', e)
@@ -3,11 +3,15 @@ import numpy as np
 import pandas as pd
 import os
 import re
-import nltk
+import yaml
 import string
+from concurrent.futures import ProcessPoolExecutor
 from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
 import logging
+from src.utils.lemmatization import LemmaCache, load_lemma_table
+from src.utils.nltk_resources import ensure_resources, configure_data_path
+from src.utils.data_io import data_file, read_frame, write_frame, iter_frame_chunks, FrameWriter
+from src.utils.parallel import resolve_workers
 
 # logging configuration
 logger = logging.getLogger('data_preprocessing')
@@ -26,9 +30,39 @@ file_handler.setFormatter(formatter)
 logger.addHandler(console_handler)
 logger.addHandler(file_handler)
 
-# Download required NLTK data
-nltk.download('wordnet')
-nltk.download('stopwords')
+
+# Lemma lookups go through the precomputed table and a bounded memo
+lemma_cache = LemmaCache(table=load_lemma_table())
+
+# Stopwords are loaded once per process, on first use
+_stop_words = None
+
+
+def get_stop_words() -> set:
+    """English stopwords minus the ones that carry sentiment."""
+    global _stop_words
+    if _stop_words is None:
+        _stop_words = set(stopwords.words('english')) - {'not', 'but', 'however', 'no', 'yet'}
+    return _stop_words
+
+
+def load_params(params_path: str) -> dict:
+    """Load parameters from a YAML file."""
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        logger.debug('Parameters retrieved from %s', params_path)
+        return params
+    except FileNotFoundError:
+        logger.error('File not found: %s', params_path)
+        raise
+    except yaml.YAMLError as e:
+        logger.error('YAML error: %s', e)
+        raise
+    except Exception as e:
+        logger.error('Unexpected error: %s', e)
+        raise
+
 
 # Define the preprocessing function
 def preprocess_comment(comment):
@@ -46,30 +80,101 @@ def preprocess_comment(comment):
         # Remove non-alphanumeric characters, except punctuation
         comment = re.sub(r'[^A-Za-z0-9\s!?.,]', '', comment)
 
-        # Remove stopwords but retain important ones for sentiment analysis
-        stop_words = set(stopwords.words('english')) - {'not', 'but', 'however', 'no', 'yet'}
-        comment = ' '.join([word for word in comment.split() if word not in stop_words])
-
-        # Lemmatize the words
-        lemmatizer = WordNetLemmatizer()
-        comment = ' '.join([lemmatizer.lemmatize(word) for word in comment.split()])
-
-        return comment
+        # Remove stopwords (retaining the sentiment-bearing ones) and lemmatize
+        return filter_and_lemmatize([comment])[0]
     except Exception as e:
         logger.error(f"Error in preprocessing comment: {e}")
         return comment
 
-def normalize_text(df):
-    """Apply preprocessing to the text data in the dataframe."""
+
+def clean_text_column(texts: pd.Series) -> tuple:
+    """
+    Vectorized case, whitespace and character cleaning of a text column.
+    Returns the cleaned strings and the mask of rows they came from; non-string
+    values (e.g. NaN) are left untouched, as preprocess_comment does.
+    """
+    is_text = texts.map(type) == str
+    # Object dtype keeps Python re semantics (Arrow-backed strings treat \s differently)
+    cleaned = (
+        texts[is_text].astype(object)
+        .str.lower()
+        .str.strip()
+        .str.replace('\n', ' ', regex=False)
+        .str.replace(r'[^A-Za-z0-9\s!?.,]', '', regex=True)
+    )
+    return cleaned, is_text
+
+
+def filter_and_lemmatize(texts: list) -> list:
+    """Remove stopwords and lemmatize already-cleaned texts in one token pass."""
+    stop_words = get_stop_words()
+    lemmatize = lemma_cache.lemmatize
+    return [' '.join([lemmatize(word) for word in text.split() if word not in stop_words]) for text in texts]
+
+
+def _make_executor(workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=workers, initializer=configure_data_path)
+
+
+def normalize_text(df, n_jobs: int = 1, chunk_size: int = 5000, executor: ProcessPoolExecutor = None):
+    """
+    Apply preprocessing to the text data in the dataframe.
+
+    Case and regex steps run as vectorized pandas string operations; the
+    stopword and lemma steps run over chunks, fanned out to a process pool
+    when n_jobs allows more than one worker. An existing executor can be
+    passed in to reuse one pool across many calls.
+    """
     try:
-        df['clean_comment'] = df['clean_comment'].apply(preprocess_comment)
-        logger.debug('Text normalization completed')
+        cleaned, is_text = clean_text_column(df['clean_comment'])
+        texts = cleaned.tolist()
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+
+        workers = min(resolve_workers(n_jobs), len(chunks))
+        if executor is not None and len(chunks) > 1:
+            results = list(executor.map(filter_and_lemmatize, chunks))
+        elif workers > 1:
+            with _make_executor(workers) as executor:
+                results = list(executor.map(filter_and_lemmatize, chunks))
+        else:
+            results = [filter_and_lemmatize(chunk) for chunk in chunks]
+            logger.debug('Lemma cache stats: %s', lemma_cache.stats())
+
+        processed = [text for chunk in results for text in chunk]
+        df['clean_comment'] = df['clean_comment'].astype(object)
+        df.loc[is_text, 'clean_comment'] = pd.Series(processed, index=cleaned.index, dtype=object)
+        logger.debug('Text normalization completed with %d worker(s) over %d chunk(s)', max(workers, 1), len(chunks))
         return df
     except Exception as e:
         logger.error(f"Error during text normalization: {e}")
         raise
 
-def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str) -> None:
+
+def normalize_file_streaming(input_path: str, output_path: str, n_jobs: int, chunk_size: int,
+                             stream_chunk_size: int) -> None:
+    """
+    Out-of-core normalization: read input_path stream_chunk_size rows at a
+    time, normalize each chunk and append it to output_path, so peak memory
+    is bounded by the chunk size rather than the corpus size.
+    """
+    try:
+        workers = resolve_workers(n_jobs)
+        executor = _make_executor(workers) if workers > 1 else None
+        try:
+            with FrameWriter(output_path) as writer:
+                for chunk in iter_frame_chunks(input_path, stream_chunk_size):
+                    writer.write(normalize_text(chunk, n_jobs=1, chunk_size=chunk_size, executor=executor))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        logger.debug(f"Streamed {writer.rows} normalized rows to {output_path}")
+    except Exception as e:
+        logger.error(f"Error during streaming normalization of {input_path}: {e}")
+        raise
+
+
+def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str, data_format: str = 'csv') -> None:
     """Save the processed train and test datasets."""
     try:
         interim_data_path = os.path.join(data_path, 'interim')
@@ -78,8 +183,8 @@ def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str)
         os.makedirs(interim_data_path, exist_ok=True)  # Ensure the directory is created
         logger.debug(f"Directory {interim_data_path} created or already exists")
 
-        train_data.to_csv(os.path.join(interim_data_path, "train_processed.csv"), index=False)
-        test_data.to_csv(os.path.join(interim_data_path, "test_processed.csv"), index=False)
+        write_frame(train_data, data_file(interim_data_path, "train_processed", data_format))
+        write_frame(test_data, data_file(interim_data_path, "test_processed", data_format))
         
         logger.debug(f"Processed data saved to {interim_data_path}")
     except Exception as e:
@@ -89,18 +194,38 @@ def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str)
 def main():
     try:
         logger.debug("Starting data preprocessing...")
+
+        # Fetch NLTK data only if it is not already available locally
+        ensure_resources(download=True)
+
+        params = load_params(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../params.yaml'))
+        n_jobs = params['data_preprocessing']['n_jobs']
+        chunk_size = params['data_preprocessing']['chunk_size']
+        data_format = params['data_io']['format']
         
+        # Process the raw splits chunk by chunk without loading them whole
+        if params['streaming']['enabled']:
+            os.makedirs('./data/interim', exist_ok=True)
+            for split in ('train', 'test'):
+                normalize_file_streaming(
+                    data_file('./data/raw', split, data_format),
+                    data_file('./data/interim', f'{split}_processed', data_format),
+                    n_jobs=n_jobs, chunk_size=chunk_size,
+                    stream_chunk_size=params['streaming']['chunk_size'],
+                )
+            return
+
         # Fetch the data from data/raw
-        train_data = pd.read_csv('./data/raw/train.csv')
-        test_data = pd.read_csv('./data/raw/test.csv')
+        train_data = read_frame(data_file('./data/raw', 'train', data_format))
+        test_data = read_frame(data_file('./data/raw', 'test', data_format))
         logger.debug('Data loaded successfully')
 
         # Preprocess the data
-        train_processed_data = normalize_text(train_data)
-        test_processed_data = normalize_text(test_data)
+        train_processed_data = normalize_text(train_data, n_jobs=n_jobs, chunk_size=chunk_size)
+        test_processed_data = normalize_text(test_data, n_jobs=n_jobs, chunk_size=chunk_size)
 
         # Save the processed data
-        save_data(train_processed_data, test_processed_data, data_path='./data')
+        save_data(train_processed_data, test_processed_data, data_path='./data', data_format=data_format)
     except Exception as e:
         logger.error('Failed to complete the data preprocessing process: %s', e)
         print(f"Error: {e}")
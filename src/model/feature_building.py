@@ -0,0 +1,292 @@
+import numpy as np
+import pandas as pd
+import os
+import pickle
+import yaml
+import logging
+from collections import Counter
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from scipy.sparse import vstack
+from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
+from src.utils.data_io import read_frame, iter_frame_chunks
+from src.utils.hashing_features import HashingTfidfVectorizer
+from src.utils.text_analyzer import CommentAnalyzer
+from src.utils.feature_store import interim_paths, pipeline_features_key, save_features, load_features
+from src.utils.parallel import resolve_workers
+
+# logging configuration
+logger = logging.getLogger('feature_building')
+logger.setLevel('DEBUG')
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel('DEBUG')
+
+file_handler = logging.FileHandler('feature_building_errors.log')
+file_handler.setLevel('ERROR')
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+
+def load_params(params_path: str) -> dict:
+    """Load parameters from a YAML file."""
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        logger.debug('Parameters retrieved from %s', params_path)
+        return params
+    except FileNotFoundError:
+        logger.error('File not found: %s', params_path)
+        raise
+    except yaml.YAMLError as e:
+        logger.error('YAML error: %s', e)
+        raise
+    except Exception as e:
+        logger.error('Unexpected error: %s', e)
+        raise
+
+
+def load_data(file_path: str) -> pd.DataFrame:
+    """Load data from a CSV or Parquet file."""
+    try:
+        df = read_frame(file_path)
+        df.fillna('', inplace=True)  # Fill any NaN values (CSV round trips empty strings as NaN)
+        logger.debug('Data loaded and NaNs filled from %s', file_path)
+        return df
+    except pd.errors.ParserError as e:
+        logger.error('Failed to parse the CSV file: %s', e)
+        raise
+    except Exception as e:
+        logger.error('Unexpected error occurred while loading the data: %s', e)
+        raise
+
+
+def apply_tfidf(train_data: pd.DataFrame, max_features: int, ngram_range: tuple) -> tuple:
+    """Apply TF-IDF with ngrams to the data."""
+    try:
+        # The fused analyzer yields the same n-grams as the default one, in one pass per comment
+        vectorizer = TfidfVectorizer(
+            max_features=max_features, analyzer=CommentAnalyzer(ngram_range), token_pattern=None
+        )
+
+        X_train = train_data['clean_comment'].values
+        y_train = train_data['category'].values
+
+        # Perform TF-IDF transformation
+        X_train_tfidf = vectorizer.fit_transform(X_train)
+
+        logger.debug(f"TF-IDF transformation complete. Train shape: {X_train_tfidf.shape}")
+        logger.debug('TF-IDF applied with trigrams and data transformed')
+        return vectorizer, X_train_tfidf, y_train
+    except Exception as e:
+        logger.error('Error during TF-IDF transformation: %s', e)
+        raise
+
+
+def iter_data_chunks(file_path: str, chunk_size: int):
+    """Yield the data file in DataFrame chunks of at most chunk_size rows, NaNs filled."""
+    try:
+        for chunk in iter_frame_chunks(file_path, chunk_size):
+            chunk.fillna('', inplace=True)
+            yield chunk
+    except pd.errors.ParserError as e:
+        logger.error('Failed to parse the CSV file: %s', e)
+        raise
+
+
+def apply_tfidf_streaming(file_path: str, max_features: int, ngram_range: tuple, chunk_size: int) -> tuple:
+    """
+    Out-of-core equivalent of apply_tfidf that never holds the raw text column.
+
+    Pass 1 streams the chunks to accumulate corpus term counts and document
+    frequencies; the vocabulary is then selected exactly as TfidfVectorizer
+    does (top max_features by term count, sorted by term). Pass 2 streams the
+    chunks again and transforms each into a sparse block. Memory is bounded
+    by the chunk size, the n-gram count table and the sparse output.
+    """
+    try:
+        counter = CountVectorizer(analyzer=CommentAnalyzer(ngram_range), token_pattern=None)
+        term_counts = Counter()
+        doc_freqs = Counter()
+        n_docs = 0
+
+        for chunk in iter_data_chunks(file_path, chunk_size):
+            counts = counter.fit_transform(chunk['clean_comment'].values)
+            n_docs += counts.shape[0]
+            chunk_tfs = np.asarray(counts.sum(axis=0)).ravel()
+            chunk_dfs = np.bincount(counts.indices, minlength=counts.shape[1])
+            for term, index in counter.vocabulary_.items():
+                term_counts[term] += int(chunk_tfs[index])
+                doc_freqs[term] += int(chunk_dfs[index])
+
+        # Same selection as CountVectorizer._limit_features on a sorted vocabulary
+        terms = np.array(sorted(term_counts), dtype=object)
+        tfs = np.array([term_counts[t] for t in terms], dtype=np.int64)
+        if max_features is not None and len(terms) > max_features:
+            terms = np.sort(terms[(-tfs).argsort()[:max_features]])
+        vocabulary = {term: index for index, term in enumerate(terms)}
+
+        vectorizer = TfidfVectorizer(
+            max_features=max_features, analyzer=CommentAnalyzer(ngram_range), token_pattern=None
+        )
+        vectorizer.vocabulary_ = vocabulary
+        dfs = np.array([doc_freqs[t] for t in terms], dtype=np.float64)
+        # Smoothed IDF, as TfidfTransformer computes it
+        vectorizer.idf_ = np.log((n_docs + 1) / (dfs + 1)) + 1
+        del term_counts, doc_freqs
+
+        X_train_tfidf, y_train = transform_streaming(vectorizer, file_path, chunk_size)
+
+        logger.debug(f"Streaming TF-IDF complete over {n_docs} documents. Train shape: {X_train_tfidf.shape}")
+        return vectorizer, X_train_tfidf, y_train
+    except Exception as e:
+        logger.error('Error during streaming TF-IDF transformation: %s', e)
+        raise
+
+
+def transform_streaming(vectorizer, file_path: str, chunk_size: int) -> tuple:
+    """Transform a data file chunk by chunk into one sparse matrix plus labels."""
+    blocks, labels = [], []
+    for chunk in iter_data_chunks(file_path, chunk_size):
+        blocks.append(vectorizer.transform(chunk['clean_comment'].values))
+        labels.append(chunk['category'].values)
+    return vstack(blocks, format='csr'), np.concatenate(labels)
+
+
+def _fit_hashing_chunk(n_features: int, ngram_range: tuple, texts) -> HashingTfidfVectorizer:
+    return HashingTfidfVectorizer(n_features=n_features, ngram_range=ngram_range).partial_fit(texts)
+
+
+def apply_hashing(train_data: pd.DataFrame, n_features: int, ngram_range: tuple, n_jobs: int = 1,
+                  chunk_size: int = 10000) -> tuple:
+    """
+    Hashed TF-IDF features. Document frequencies are counted per chunk on a
+    process pool and summed into one IDF array; the chunks are then
+    transformed in parallel, since hashing needs no shared vocabulary.
+    """
+    try:
+        texts = train_data['clean_comment'].values
+        y_train = train_data['category'].values
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        workers = min(resolve_workers(n_jobs), len(chunks))
+
+        vectorizer = HashingTfidfVectorizer(n_features=n_features, ngram_range=ngram_range)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for fitted in executor.map(partial(_fit_hashing_chunk, n_features, ngram_range), chunks):
+                    vectorizer.merge(fitted)
+                X_train = vstack(list(executor.map(vectorizer.transform, chunks)), format='csr')
+        else:
+            X_train = vectorizer.fit_transform(texts)
+
+        logger.debug(f"Hashed TF-IDF complete on {workers} workers. Train shape: {X_train.shape}")
+        return vectorizer, X_train, y_train
+    except Exception as e:
+        logger.error('Error during hashed TF-IDF transformation: %s', e)
+        raise
+
+
+def apply_hashing_streaming(file_path: str, n_features: int, ngram_range: tuple, chunk_size: int) -> tuple:
+    """Out-of-core apply_hashing: one pass for document frequencies, one to transform."""
+    try:
+        vectorizer = HashingTfidfVectorizer(n_features=n_features, ngram_range=ngram_range)
+        for chunk in iter_data_chunks(file_path, chunk_size):
+            vectorizer.partial_fit(chunk['clean_comment'].values)
+
+        X_train, y_train = transform_streaming(vectorizer, file_path, chunk_size)
+        logger.debug(f"Streaming hashed TF-IDF complete over {vectorizer.n_docs_} documents. Train shape: {X_train.shape}")
+        return vectorizer, X_train, y_train
+    except Exception as e:
+        logger.error('Error during streaming hashed TF-IDF transformation: %s', e)
+        raise
+
+
+def save_vectorizer(vectorizer) -> None:
+    """Save the fitted vectorizer in the root directory."""
+    with open(os.path.join(get_root_directory(), 'tfidf_vectorizer.pkl'), 'wb') as f:
+        pickle.dump(vectorizer, f)
+
+
+def get_root_directory() -> str:
+    """Get the root directory (two levels up from this script's location)."""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.abspath(os.path.join(current_dir, '../../'))
+
+
+def main():
+    try:
+        root_dir = get_root_directory()
+        params = load_params(os.path.join(root_dir, 'params.yaml'))
+        max_features = params['model_building']['max_features']
+        ngram_range = tuple(params['model_building']['ngram_range'])
+        features = params['features']
+        incremental = params['incremental']
+
+        train_path, test_path = interim_paths(root_dir, params)
+
+        processed_dir = os.path.join(root_dir, 'data/processed')
+        train_features_path = os.path.join(processed_dir, 'train_features.npz')
+        test_features_path = os.path.join(processed_dir, 'test_features.npz')
+        vectorizer_path = os.path.join(root_dir, 'tfidf_vectorizer.pkl')
+
+        if incremental['enabled']:
+            # Keep the registered model's vocabulary so its trees stay valid.
+            # Imported here so regular runs do not need MLflow or NLTK data.
+            from src.utils.inference import load_model_and_artifacts
+
+            _, vectorizer = load_model_and_artifacts(incremental['model_name'], incremental['stage'])
+            save_vectorizer(vectorizer)
+
+        # Skip all text processing if the cached features match params and data
+        key = pipeline_features_key(root_dir, params)
+        if (os.path.exists(vectorizer_path)
+                and load_features(train_features_path, key) is not None
+                and load_features(test_features_path, key) is not None):
+            logger.debug('Cached features are up to date (key %s)', key[:12])
+            return
+
+        streaming = params['streaming']['enabled']
+        chunk_size = params['streaming']['chunk_size']
+        if incremental['enabled']:
+            if streaming:
+                X_train, y_train = transform_streaming(vectorizer, train_path, chunk_size)
+            else:
+                train_data = load_data(train_path)
+                X_train, y_train = vectorizer.transform(train_data['clean_comment'].values), train_data['category'].values
+        elif features['mode'] == 'hashing':
+            if streaming:
+                vectorizer, X_train, y_train = apply_hashing_streaming(train_path, features['n_features'], ngram_range, chunk_size)
+            else:
+                vectorizer, X_train, y_train = apply_hashing(
+                    load_data(train_path), features['n_features'], ngram_range, features['n_jobs']
+                )
+        elif streaming:
+            # Build features chunk by chunk without loading the raw text column
+            vectorizer, X_train, y_train = apply_tfidf_streaming(train_path, max_features, ngram_range, chunk_size)
+        else:
+            vectorizer, X_train, y_train = apply_tfidf(load_data(train_path), max_features, ngram_range)
+
+        if streaming:
+            X_test, y_test = transform_streaming(vectorizer, test_path, chunk_size)
+        else:
+            test_data = load_data(test_path)
+            X_test, y_test = vectorizer.transform(test_data['clean_comment'].values), test_data['category'].values
+
+        if not incremental['enabled']:
+            save_vectorizer(vectorizer)
+        save_features(train_features_path, X_train, y_train, key)
+        save_features(test_features_path, X_test, y_test, key)
+        logger.debug('Features saved to %s (key %s)', processed_dir, key[:12])
+
+    except Exception as e:
+        logger.error('Failed to complete the feature building process: %s', e)
+        print(f"Error: {e}")
+
+
+if __name__ == '__main__':
+    main()
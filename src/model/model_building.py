@@ -1,11 +1,18 @@
 import numpy as np
-import pandas as pd
 import os
+import json
+import time
 import pickle
+import hashlib
 import yaml
 import logging
 import lightgbm as lgb
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import LabelEncoder
+from src.utils.data_io import read_frame
+from src.utils.feature_store import (
+    interim_paths, stored_features_key, load_features, row_hashes, load_watermark, save_watermark,
+    model_fingerprint
+)
 
 # logging configuration
 logger = logging.getLogger('model_building')
@@ -24,6 +31,8 @@ file_handler.setFormatter(formatter)
 logger.addHandler(console_handler)
 logger.addHandler(file_handler)
 
+TRAIN_FEATURES = 'data/processed/train_features.npz'
+
 
 def load_params(params_path: str) -> dict:
     """Load parameters from a YAML file."""
@@ -43,61 +52,136 @@ def load_params(params_path: str) -> dict:
         raise
 
 
-def load_data(file_path: str) -> pd.DataFrame:
-    """Load data from a CSV file."""
+def load_train_features(root_dir: str, key: str) -> tuple:
+    """Load the cached training features, refusing ones that changed since `key` was read."""
     try:
-        df = pd.read_csv(file_path)
-        df.fillna('', inplace=True)  # Fill any NaN values
-        logger.debug('Data loaded and NaNs filled from %s', file_path)
-        return df
-    except pd.errors.ParserError as e:
-        logger.error('Failed to parse the CSV file: %s', e)
-        raise
+        features = load_features(os.path.join(root_dir, TRAIN_FEATURES), key)
+        if features is None:
+            raise FileNotFoundError(
+                'Training features are missing or changed; run src/model/feature_building.py first.'
+            )
+        logger.debug('Loaded cached training features with shape %s', features[0].shape)
+        return features
     except Exception as e:
-        logger.error('Unexpected error occurred while loading the data: %s', e)
+        logger.error('Error while loading training features: %s', e)
         raise
 
 
-def apply_tfidf(train_data: pd.DataFrame, max_features: int, ngram_range: tuple) -> tuple:
-    """Apply TF-IDF with ngrams to the data."""
-    try:
-        vectorizer = TfidfVectorizer(max_features=max_features, ngram_range=ngram_range)
+def dataset_params(params: dict) -> dict:
+    """LightGBM parameters that control histogram binning of the training Dataset."""
+    return {'max_bin': params['model_building']['max_bin'], 'verbose': -1}
 
-        X_train = train_data['clean_comment'].values
-        y_train = train_data['category'].values
 
-        # Perform TF-IDF transformation
-        X_train_tfidf = vectorizer.fit_transform(X_train)
+def encode_labels(y: np.ndarray, classes: np.ndarray) -> tuple:
+    """Same label encoding and "balanced" class weights as LGBMClassifier applies."""
+    unknown = set(np.unique(y)) - set(classes)
+    if unknown:
+        raise ValueError(f"Labels {sorted(unknown)} are not among the model classes {classes.tolist()}")
+    y_encoded = np.searchsorted(classes, y)
+    counts = np.bincount(y_encoded, minlength=len(classes))
+    present = np.count_nonzero(counts)
+    weights = (len(y) / (present * np.maximum(counts, 1)))[y_encoded]
+    return y_encoded, weights
 
-        logger.debug(f"TF-IDF transformation complete. Train shape: {X_train_tfidf.shape}")
 
-        # Save the vectorizer in the root directory
-        with open(os.path.join(get_root_directory(), 'tfidf_vectorizer.pkl'), 'wb') as f:
-            pickle.dump(vectorizer, f)
-
-        logger.debug('TF-IDF applied with trigrams and data transformed')
-        return X_train_tfidf, y_train
+def load_train_dataset(root_dir: str, key: str, params: dict) -> tuple:
+    """
+    Return (lgb.Dataset, classes) for the training features. The binned
+    Dataset is saved in LightGBM's binary format under data/cache and
+    reused while its features key and binning params are unchanged, so the
+    histogram bins are only computed once per feature set.
+    """
+    try:
+        binning = dataset_params(params)
+        dataset_key = hashlib.sha256(json.dumps([key, binning], sort_keys=True).encode('utf-8')).hexdigest()
+        bin_path = os.path.join(root_dir, 'data/cache/train_dataset.bin')
+        meta_path = bin_path + '.json'
+
+        started = time.perf_counter()
+        if os.path.exists(bin_path) and os.path.exists(meta_path):
+            with open(meta_path, 'r') as file:
+                meta = json.load(file)
+            if meta['key'] == dataset_key:
+                train_set = lgb.Dataset(bin_path, params=binning).construct()
+                logger.debug('Loaded binned Dataset from %s in %.3fs', bin_path, time.perf_counter() - started)
+                return train_set, np.array(meta['classes'])
+
+        X_train, y_train = load_train_features(root_dir, key)
+
+        classes = np.unique(y_train)
+        y_encoded, weights = encode_labels(y_train, classes)
+
+        train_set = lgb.Dataset(X_train, label=y_encoded, weight=weights, params=binning, free_raw_data=True).construct()
+        logger.debug('Binned Dataset %s in %.3fs', X_train.shape, time.perf_counter() - started)
+
+        os.makedirs(os.path.dirname(bin_path), exist_ok=True)
+        if os.path.exists(bin_path):
+            os.remove(bin_path)
+        train_set.save_binary(bin_path)
+        with open(meta_path, 'w') as file:
+            json.dump({'key': dataset_key, 'classes': classes.tolist()}, file)
+        return train_set, classes
     except Exception as e:
-        logger.error('Error during TF-IDF transformation: %s', e)
+        logger.error('Error while preparing the LightGBM Dataset: %s', e)
         raise
 
 
-def train_lgbm(X_train: np.ndarray, y_train: np.ndarray, learning_rate: float, max_depth: int, n_estimators: int) -> lgb.LGBMClassifier:
-    """Train a LightGBM model."""
+def classifier_from_booster(booster: lgb.Booster, classes: np.ndarray, **kwargs) -> lgb.LGBMClassifier:
+    """
+    Wrap a Booster trained with lgb.train in a fitted LGBMClassifier, so the
+    pickled model and the MLflow sklearn flavor behave as if fit() trained it.
+    """
+    model = lgb.LGBMClassifier(**kwargs)
+    model._Booster = booster
+    model._le = LabelEncoder().fit(classes)
+    model._classes = model._le.classes_
+    model._n_classes = len(classes)
+    model._class_map = dict(zip(model._le.classes_, model._le.transform(model._le.classes_)))
+    model._objective = kwargs.get('objective')
+    model._class_weight = kwargs.get('class_weight')
+    model._n_features = booster.num_feature()
+    model._n_features_in = booster.num_feature()
+    model._evals_result = {}
+    model._best_iteration = booster.best_iteration
+    model._best_score = booster.best_score
+    model.fitted_ = True
+    return model
+
+
+def lgbm_params(learning_rate: float, max_depth: int, n_estimators: int, training: dict) -> dict:
+    """Constructor arguments of the LGBMClassifier this pipeline trains."""
+    return dict(
+        objective='multiclass',
+        num_class=3,
+        metric="multi_logloss",
+        is_unbalance=True,
+        class_weight="balanced",
+        reg_alpha=0.1,  # L1 regularization
+        reg_lambda=0.1,  # L2 regularization
+        learning_rate=learning_rate,
+        max_depth=max_depth,
+        n_estimators=n_estimators,
+        n_jobs=training['num_threads'],
+        max_bin=training['max_bin'],
+        force_col_wise=training['force_col_wise'],
+        force_row_wise=training['force_row_wise'],
+    )
+
+
+def train_lgbm(train_set: lgb.Dataset, classes: np.ndarray, learning_rate: float, max_depth: int, n_estimators: int,
+               training: dict, init_model: lgb.Booster = None) -> lgb.LGBMClassifier:
+    """Train a LightGBM model on a Dataset, optionally appending rounds to init_model."""
     try:
-        best_model = lgb.LGBMClassifier(
-            objective='multiclass',
-            num_class=3,
-            metric="multi_logloss",
-            is_unbalance=True,
-            class_weight="balanced",
-            reg_alpha=0.1,  # L1 regularization
-            reg_lambda=0.1,  # L2 regularization
-            learning_rate=learning_rate,
-            max_depth=max_depth,
-            n_estimators=n_estimators
-        )
-        best_model.fit(X_train, y_train)
+        model_params = lgbm_params(learning_rate, max_depth, n_estimators, training)
+        booster_params = {k: v for k, v in model_params.items() if k not in ('class_weight', 'n_estimators', 'n_jobs')}
+        booster_params.update(num_threads=training['num_threads'], verbose=-1)
+
+        started = time.perf_counter()
+        booster = lgb.train(booster_params, train_set, num_boost_round=n_estimators, init_model=init_model)
+        logger.debug('Boosted %d rounds in %.3fs', n_estimators, time.perf_counter() - started)
+
+        model_params['n_estimators'] = booster.current_iteration()
+        best_model = classifier_from_booster(booster, classes, **model_params)
         logger.debug('LightGBM model training completed')
         return best_model
     except Exception as e:
@@ -105,6 +189,44 @@ def train_lgbm(X_train: np.ndarray, y_train: np.ndarray, learning_rate: float, m
         raise
 
 
+def load_base_model(incremental: dict):
+    """The registered model incremental training warm-starts from, as a SparseScorer."""
+    try:
+        from src.utils.inference import load_model_and_artifacts, get_sparse_scorer
+
+        model, _ = load_model_and_artifacts(incremental['model_name'], incremental['stage'])
+        return get_sparse_scorer(model)
+    except Exception as e:
+        logger.error('Error while loading the registered base model: %s', e)
+        raise
+
+
+def train_incremental(root_dir: str, key: str, base, new_rows: np.ndarray, learning_rate: float, max_depth: int,
+                      training: dict, incremental: dict) -> lgb.LGBMClassifier:
+    """
+    Warm-start from the registered model: append incremental['n_estimators']
+    boosting rounds trained only on the rows the watermark has not seen yet.
+    """
+    try:
+        X_train, y_train = load_train_features(root_dir, key)
+        X_new, y_new = X_train[new_rows], y_train[new_rows]
+        logger.debug('Incremental training on %d new of %d rows', len(y_new), len(y_train))
+
+        if len(y_new) == 0:
+            logger.info('No new training rows since the watermark; keeping the registered model')
+            model_params = lgbm_params(learning_rate, max_depth, base.booster.current_iteration(), training)
+            return classifier_from_booster(base.booster, base.classes, **model_params)
+
+        # Not pre-constructed: LightGBM needs the raw rows to score them with init_model
+        y_encoded, weights = encode_labels(y_new, base.classes)
+        new_set = lgb.Dataset(X_new, label=y_encoded, weight=weights, params=dataset_params({'model_building': training}))
+        return train_lgbm(new_set, base.classes, learning_rate, max_depth, incremental['n_estimators'], training,
+                          init_model=base.booster)
+    except Exception as e:
+        logger.error('Error during incremental training: %s', e)
+        raise
+
+
 def save_model(model, file_path: str) -> None:
     """Save the trained model to a file."""
     try:
@@ -129,24 +251,46 @@ def main():
 
         # Load parameters from the root directory
         params = load_params(os.path.join(root_dir, 'params.yaml'))
-        max_features = params['model_building']['max_features']
-        ngram_range = tuple(params['model_building']['ngram_range'])
 
         learning_rate = params['model_building']['learning_rate']
         max_depth = params['model_building']['max_depth']
         n_estimators = params['model_building']['n_estimators']
 
-        # Load the preprocessed training data from the interim directory
-        train_data = load_data(os.path.join(root_dir, 'data/interim/train_processed.csv'))
-
-        # Apply TF-IDF feature engineering on training data
-        X_train_tfidf, y_train = apply_tfidf(train_data, max_features, ngram_range)
-
-        # Train the LightGBM model using hyperparameters from params.yaml
-        best_model = train_lgbm(X_train_tfidf, y_train, learning_rate, max_depth, n_estimators)
+        training = {k: params['model_building'][k] for k in ('num_threads', 'max_bin', 'force_col_wise', 'force_row_wise')}
+        incremental = params['incremental']
+        # Written by feature_building, which owns the feature params and data hashing
+        key = stored_features_key(os.path.join(root_dir, TRAIN_FEATURES))
+        if key is None:
+            raise FileNotFoundError('No training features; run src/model/feature_building.py first.')
+
+        # Rows of the training set, identified by content, and those already trained on
+        train_path, _ = interim_paths(root_dir, params)
+        hashes = row_hashes(read_frame(train_path, columns=['clean_comment', 'category']).fillna(''))
+        watermark_path = os.path.join(root_dir, 'data/train_watermark.npz')
+        trained = None
+        if incremental['enabled'] and os.path.exists(watermark_path):
+            # The watermark only applies to the model it was written for; a
+            # rolled-back or replaced registered model starts over from scratch
+            base = load_base_model(incremental)
+            trained = load_watermark(watermark_path, model_fingerprint(base.booster))
+
+        if trained is not None:
+            new_rows = ~np.isin(hashes, trained)
+            best_model = train_incremental(root_dir, key, base, new_rows, learning_rate, max_depth, training, incremental)
+            hashes = np.concatenate([trained, hashes])
+        else:
+            if incremental['enabled']:
+                logger.warning('No watermark for the registered model at %s; training from scratch', watermark_path)
+
+            # Reuse the TF-IDF features written by the feature_building stage, binned once
+            train_set, classes = load_train_dataset(root_dir, key, params)
+
+            # Train the LightGBM model using hyperparameters from params.yaml
+            best_model = train_lgbm(train_set, classes, learning_rate, max_depth, n_estimators, training)
 
         # Save the trained model in the root directory
         save_model(best_model, os.path.join(root_dir, 'lgbm_model.pkl'))
+        save_watermark(watermark_path, hashes, model_fingerprint(best_model.booster_))
 
     except Exception as e:
         logger.error('Failed to complete the feature engineering and model building process: %s', e)
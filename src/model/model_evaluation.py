@@ -15,6 +15,8 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from mlflow.exceptions import MlflowException
 from mlflow.tracking import MlflowClient
+from src.utils.data_io import read_frame
+from src.utils.feature_store import load_features
 
 # Load environment variables
 load_dotenv(override=True)
@@ -40,11 +42,23 @@ def load_yaml(path):
     with open(path, "r") as f:
         return yaml.safe_load(f)
 
-def load_csv(path):
-    df = pd.read_csv(path)
+def load_data(path):
+    df = read_frame(path)
     df.fillna("", inplace=True)
     return df
 
+def load_test_features(root: str, vectorizer):
+    """Load the test features written by feature_building alongside the vectorizer."""
+    features = load_features(os.path.join(root, "data/processed/test_features.npz"))
+    if features is None:
+        raise FileNotFoundError("No test features; run src/model/feature_building.py first.")
+    logger.debug("Using cached test features")
+    X_test, y_test = features
+    # A pruned vectorizer keeps only the model's columns of the cached full-width features
+    if hasattr(vectorizer, "select"):
+        X_test = vectorizer.select(X_test)
+    return X_test, y_test
+
 def ensure_experiment(name: str) -> str:
     """Ensure experiment exists or create a new one. Returns experiment_id."""
     client = MlflowClient()
@@ -106,9 +120,9 @@ def main():
 
         # Load config
         params = load_yaml(os.path.join(root, "params.yaml"))
-        model_path = os.path.join(root, "lgbm_model.pkl")
-        vectorizer_path = os.path.join(root, "tfidf_vectorizer.pkl")
-        test_path = os.path.join(root, "data/interim/test_processed.csv")
+        prefix = "pruned_" if params["pruning"]["enabled"] else ""
+        model_path = os.path.join(root, f"{prefix}lgbm_model.pkl")
+        vectorizer_path = os.path.join(root, f"{prefix}tfidf_vectorizer.pkl")
 
         with mlflow.start_run(experiment_id=experiment_id) as run:
             # Log parameters
@@ -118,10 +132,7 @@ def main():
             # Load model, vectorizer, test data
             model = load_pickle(model_path)
             vectorizer = load_pickle(vectorizer_path)
-            df = load_csv(test_path)
-
-            X_test = vectorizer.transform(df["clean_comment"])
-            y_test = df["category"].values
+            X_test, y_test = load_test_features(root, vectorizer)
 
             input_example = pd.DataFrame(X_test.toarray()[:5], columns=vectorizer.get_feature_names_out())
             signature = infer_signature(input_example, model.predict(X_test[:5]))
@@ -155,6 +166,8 @@ def main():
             mlflow.set_tags({
                 "model_type": "LightGBM",
                 "dataset": "YouTube Comments",
+                "feature_mode": params["features"]["mode"],
+                "n_features": len(vectorizer.get_feature_names_out()),
                 "stage": "evaluation complete"
             })
 
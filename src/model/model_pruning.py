@@ -0,0 +1,120 @@
+import numpy as np
+import os
+import pickle
+import yaml
+import logging
+from src.utils.feature_store import load_features
+from src.utils.feature_pruning import prune_model
+from src.model.model_building import classifier_from_booster
+
+# logging configuration
+logger = logging.getLogger('model_pruning')
+logger.setLevel('DEBUG')
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel('DEBUG')
+
+file_handler = logging.FileHandler('model_pruning_errors.log')
+file_handler.setLevel('ERROR')
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+
+def load_params(params_path: str) -> dict:
+    """Load parameters from a YAML file."""
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        logger.debug('Parameters retrieved from %s', params_path)
+        return params
+    except FileNotFoundError:
+        logger.error('File not found: %s', params_path)
+        raise
+    except yaml.YAMLError as e:
+        logger.error('YAML error: %s', e)
+        raise
+    except Exception as e:
+        logger.error('Unexpected error: %s', e)
+        raise
+
+
+def load_pickle(file_path: str):
+    """Load a pickled model or vectorizer."""
+    try:
+        with open(file_path, 'rb') as file:
+            obj = pickle.load(file)
+        logger.debug('Loaded %s', file_path)
+        return obj
+    except Exception as e:
+        logger.error('Error while loading %s: %s', file_path, e)
+        raise
+
+
+def save_pickle(obj, file_path: str) -> None:
+    """Pickle a model or vectorizer to a file."""
+    try:
+        with open(file_path, 'wb') as file:
+            pickle.dump(obj, file)
+        logger.debug('Saved %s (%.1f KB)', file_path, os.path.getsize(file_path) / 1024)
+    except Exception as e:
+        logger.error('Error while saving %s: %s', file_path, e)
+        raise
+
+
+def load_test_set(root_dir: str) -> tuple:
+    """Test features written by feature_building alongside the vectorizer."""
+    features = load_features(os.path.join(root_dir, 'data/processed/test_features.npz'))
+    if features is None:
+        raise FileNotFoundError('No test features; run src/model/feature_building.py first.')
+    return features
+
+
+def verify_pruning(model, pruned_model, pruned_vectorizer, X_test) -> None:
+    """Raise if the pruned model does not reproduce the original model's predictions exactly."""
+    expected = model.predict_proba(X_test)
+    got = pruned_model.predict_proba(pruned_vectorizer.select(X_test))
+    mismatched = int(np.sum(np.any(expected != got, axis=1)))
+    if mismatched:
+        raise ValueError(
+            f'Pruned model differs on {mismatched} of {X_test.shape[0]} test rows '
+            f'(max abs diff {np.abs(expected - got).max():.3g})'
+        )
+    logger.debug('Pruned model reproduces all %d test predictions exactly', X_test.shape[0])
+
+
+def get_root_directory() -> str:
+    """Get the root directory (two levels up from this script's location)."""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.abspath(os.path.join(current_dir, '../../'))
+
+
+def main():
+    try:
+        root_dir = get_root_directory()
+
+        model = load_pickle(os.path.join(root_dir, 'lgbm_model.pkl'))
+        vectorizer = load_pickle(os.path.join(root_dir, 'tfidf_vectorizer.pkl'))
+        X_test, _ = load_test_set(root_dir)
+
+        # Keep only the columns the trees split on and renumber the booster to match
+        pruned_booster, pruned_vectorizer = prune_model(model, vectorizer)
+        pruned_model = classifier_from_booster(pruned_booster, model.classes_, **model.get_params())
+
+        verify_pruning(model, pruned_model, pruned_vectorizer, X_test)
+
+        save_pickle(pruned_model, os.path.join(root_dir, 'pruned_lgbm_model.pkl'))
+        save_pickle(pruned_vectorizer, os.path.join(root_dir, 'pruned_tfidf_vectorizer.pkl'))
+        logger.debug('Pruned features from %d to %d', model.booster_.num_feature(), pruned_booster.num_feature())
+
+    except Exception as e:
+        logger.error('Failed to complete the model pruning process: %s', e)
+        print(f"Error: {e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+import numpy as np
+import os
+import re
+import json
+import time
+import yaml
+import logging
+import lightgbm as lgb
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from sklearn.model_selection import StratifiedKFold
+from src.utils.feature_store import interim_paths, features_key, save_features, load_features
+from src.utils.parallel import resolve_workers
+from src.model.feature_building import (
+    load_data, apply_tfidf, apply_tfidf_streaming, apply_hashing, apply_hashing_streaming
+)
+
+# logging configuration
+logger = logging.getLogger('model_tuning')
+logger.setLevel('DEBUG')
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel('DEBUG')
+
+file_handler = logging.FileHandler('model_tuning_errors.log')
+file_handler.setLevel('ERROR')
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+# Hyperparameters written back to the model_building section of params.yaml
+TUNED_KEYS = ['max_features', 'ngram_range', 'learning_rate', 'max_depth', 'n_estimators']
+
+# Feature matrices already loaded in this worker process, by path
+_worker_features = {}
+
+
+def load_params(params_path: str) -> dict:
+    """Load parameters from a YAML file."""
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        logger.debug('Parameters retrieved from %s', params_path)
+        return params
+    except FileNotFoundError:
+        logger.error('File not found: %s', params_path)
+        raise
+    except yaml.YAMLError as e:
+        logger.error('YAML error: %s', e)
+        raise
+    except Exception as e:
+        logger.error('Unexpected error: %s', e)
+        raise
+
+
+def sample_candidates(search_space: dict, n_trials: int, seed: int) -> list:
+    """Draw random configurations from the search space in params.yaml."""
+    rng = np.random.default_rng(seed)
+    low, high = np.log(search_space['learning_rate'])
+    depth_low, depth_high = search_space['max_depth']
+    candidates = []
+    for _ in range(n_trials):
+        candidates.append({
+            'max_features': int(rng.choice(search_space['max_features'])),
+            'ngram_range': list(search_space['ngram_range'][rng.integers(len(search_space['ngram_range']))]),
+            'learning_rate': round(float(np.exp(rng.uniform(low, high))), 4),
+            'max_depth': int(rng.integers(depth_low, depth_high + 1)),
+        })
+    return candidates
+
+
+def build_tuning_features(root_dir: str, params: dict, max_features: int, ngram_range: list) -> str:
+    """
+    Path of the training features for one vectorizer configuration, building
+    and caching them under data/processed/tuning if no cached copy matches.
+    Features are built in the configured features.mode; in hashing mode
+    max_features does not apply, so candidates differing only in it share
+    one matrix.
+    """
+    try:
+        train_path, test_path = interim_paths(root_dir, params)
+        features = params['features']
+        hashing = features['mode'] == 'hashing'
+        if hashing:
+            max_features = params['model_building']['max_features']
+        config = dict(params, model_building=dict(params['model_building'], max_features=max_features, ngram_range=ngram_range))
+        key = features_key(config, [train_path, test_path])
+
+        # The feature_building stage output can be reused when it matches
+        processed_path = os.path.join(root_dir, 'data/processed/train_features.npz')
+        if load_features(processed_path, key) is not None:
+            return processed_path
+
+        path = os.path.join(root_dir, 'data/processed/tuning', f'train_features_{key[:16]}.npz')
+        if load_features(path, key) is None:
+            if hashing and params['streaming']['enabled']:
+                _, X_train, y_train = apply_hashing_streaming(
+                    train_path, features['n_features'], tuple(ngram_range), params['streaming']['chunk_size']
+                )
+            elif hashing:
+                _, X_train, y_train = apply_hashing(
+                    load_data(train_path), features['n_features'], tuple(ngram_range), features['n_jobs']
+                )
+            elif params['streaming']['enabled']:
+                _, X_train, y_train = apply_tfidf_streaming(
+                    train_path, max_features, tuple(ngram_range), params['streaming']['chunk_size']
+                )
+            else:
+                _, X_train, y_train = apply_tfidf(load_data(train_path), max_features, tuple(ngram_range))
+            save_features(path, X_train, y_train, key)
+        return path
+    except Exception as e:
+        logger.error('Error while building tuning features: %s', e)
+        raise
+
+
+def evaluate_fold(task: dict) -> dict:
+    """Fit one candidate on one fold with early stopping; runs in a worker process."""
+    path = task['features_path']
+    if path not in _worker_features:
+        _worker_features[path] = load_features(path)
+    X, y = _worker_features[path]
+
+    folds = StratifiedKFold(n_splits=task['n_folds'], shuffle=True, random_state=task['seed'])
+    train_idx, valid_idx = list(folds.split(np.zeros(len(y)), y))[task['fold']]
+
+    model = lgb.LGBMClassifier(
+        objective='multiclass',
+        num_class=3,
+        metric='multi_logloss',
+        class_weight='balanced',
+        reg_alpha=0.1,
+        reg_lambda=0.1,
+        learning_rate=task['learning_rate'],
+        max_depth=task['max_depth'],
+        n_estimators=task['max_estimators'],
+        n_jobs=1,  # the process pool provides the parallelism
+        verbose=-1,
+    )
+    model.fit(
+        X[train_idx], y[train_idx],
+        eval_set=[(X[valid_idx], y[valid_idx])],
+        callbacks=[lgb.early_stopping(task['early_stopping_rounds'], verbose=False)],
+    )
+    accuracy = float(np.mean(model.predict(X[valid_idx]) == y[valid_idx]))
+    return {
+        'trial': task['trial'],
+        'fold': task['fold'],
+        'multi_logloss': float(model.best_score_['valid_0']['multi_logloss']),
+        'accuracy': accuracy,
+        'best_iteration': int(model.best_iteration_ or task['max_estimators']),
+    }
+
+
+def run_search(candidates: list, feature_paths: dict, tuning: dict) -> list:
+    """Evaluate every (candidate, fold) pair on a process pool and aggregate per candidate."""
+    tasks = []
+    for trial, candidate in enumerate(candidates):
+        features_path = feature_paths[(candidate['max_features'], tuple(candidate['ngram_range']))]
+        for fold in range(tuning['n_folds']):
+            tasks.append(dict(
+                candidate,
+                trial=trial,
+                fold=fold,
+                features_path=features_path,
+                n_folds=tuning['n_folds'],
+                seed=tuning['seed'],
+                max_estimators=tuning['max_estimators'],
+                early_stopping_rounds=tuning['early_stopping_rounds'],
+            ))
+
+    workers = min(resolve_workers(tuning['n_jobs']), len(tasks))
+    logger.debug('Evaluating %d trials x %d folds on %d worker processes', len(candidates), tuning['n_folds'], workers)
+
+    fold_results = []
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(evaluate_fold, task) for task in tasks]
+            for future in as_completed(futures):
+                fold_results.append(future.result())
+    else:
+        fold_results = [evaluate_fold(task) for task in tasks]
+
+    results = []
+    for trial, candidate in enumerate(candidates):
+        folds = [r for r in fold_results if r['trial'] == trial]
+        results.append(dict(
+            candidate,
+            trial=trial,
+            multi_logloss=float(np.mean([r['multi_logloss'] for r in folds])),
+            accuracy=float(np.mean([r['accuracy'] for r in folds])),
+            n_estimators=int(round(np.mean([r['best_iteration'] for r in folds]))),
+        ))
+    return sorted(results, key=lambda r: r['multi_logloss'])
+
+
+def write_back_params(params_path: str, values: dict) -> None:
+    """
+    Replace the given keys in the model_building section of params.yaml,
+    editing lines in place so comments and layout are preserved.
+    """
+    try:
+        with open(params_path, 'r') as file:
+            lines = file.read().split('\n')
+
+        in_section = False
+        for i, line in enumerate(lines):
+            if re.match(r'^\S', line):
+                in_section = line.startswith('model_building:')
+                continue
+            match = re.match(r'^(\s+)(\w+):(\s*)([^#]*?)(\s*#.*)?$', line)
+            if in_section and match and match.group(2) in values:
+                value = values[match.group(2)]
+                text = f"[{', '.join(str(v) for v in value)}]" if isinstance(value, (list, tuple)) else str(value)
+                lines[i] = f"{match.group(1)}{match.group(2)}: {text}{match.group(5) or ''}"
+
+        with open(params_path, 'w') as file:
+            file.write('\n'.join(lines))
+        logger.debug('Wrote tuned parameters %s to %s', values, params_path)
+    except Exception as e:
+        logger.error('Error while writing tuned parameters: %s', e)
+        raise
+
+
+def get_root_directory() -> str:
+    """Get the root directory (two levels up from this script's location)."""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.abspath(os.path.join(current_dir, '../../'))
+
+
+def main():
+    try:
+        root_dir = get_root_directory()
+        params_path = os.path.join(root_dir, 'params.yaml')
+        params = load_params(params_path)
+        tuning = params['model_tuning']
+
+        candidates = sample_candidates(tuning['search_space'], tuning['n_trials'], tuning['seed'])
+
+        # Build (or reuse) one cached feature matrix per vectorizer configuration
+        started = time.perf_counter()
+        feature_paths = {}
+        for candidate in candidates:
+            config = (candidate['max_features'], tuple(candidate['ngram_range']))
+            if config not in feature_paths:
+                feature_paths[config] = build_tuning_features(root_dir, params, *config)
+        features_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        results = run_search(candidates, feature_paths, tuning)
+        search_seconds = time.perf_counter() - started
+
+        best = results[0]
+        logger.debug(
+            'Best trial %d: %s (multi_logloss %.4f, accuracy %.4f); features %.1fs, search %.1fs',
+            best['trial'], {k: best[k] for k in TUNED_KEYS}, best['multi_logloss'], best['accuracy'],
+            features_seconds, search_seconds,
+        )
+
+        with open(os.path.join(root_dir, 'tuning_results.json'), 'w') as file:
+            json.dump({
+                'best': best,
+                'workers': min(resolve_workers(tuning['n_jobs']), len(candidates) * tuning['n_folds']),
+                'features_seconds': features_seconds,
+                'search_seconds': search_seconds,
+                'trials': results,
+            }, file, indent=4)
+
+        if tuning['write_params']:
+            # max_features has no effect in hashing mode, so leave it as configured
+            tuned_keys = [k for k in TUNED_KEYS if not (k == 'max_features' and params['features']['mode'] == 'hashing')]
+            write_back_params(params_path, {k: best[k] for k in tuned_keys})
+
+    except Exception as e:
+        logger.error('Failed to complete the model tuning process: %s', e)
+        print(f"Error: {e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -58,6 +58,12 @@ def register_model(model_name: str, model_info: dict):
 
         model_version = mlflow.register_model(model_uri, model_name)
 
+        # Carry the feature mode over so consumers know which vectorizer artifact to expect
+        run_tags = client.get_run(model_info['run_id']).data.tags
+        for tag in ("feature_mode", "n_features"):
+            if tag in run_tags:
+                client.set_model_version_tag(model_name, model_version.version, tag, run_tags[tag])
+
         client.transition_model_version_stage(
             name=model_name,
             version=model_version.version,
@@ -0,0 +1,234 @@
+# src/utils/batching.py
+
+import queue
+import logging
+import threading
+import time
+from collections import deque
+
+# Logger setup
+logger = logging.getLogger("batching")
+logger.setLevel(logging.INFO)
+
+if not logger.handlers:
+    console_handler = logging.StreamHandler()
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    console_handler.setFormatter(formatter)
+    logger.addHandler(console_handler)
+
+_STOP = object()
+
+
+class _BatchRequest:
+    """One caller's slice of a micro-batch."""
+
+    __slots__ = ("items", "enqueued_at", "done", "result", "error")
+
+    def __init__(self, items: list):
+        self.items = items
+        self.enqueued_at = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class BatchStats:
+    """
+    Thread-safe batch-size and queue-wait statistics over a sliding window
+    of recent batches, plus running totals.
+    """
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._batch_sizes = deque(maxlen=window)
+        self._queue_waits_ms = deque(maxlen=window)
+        self._predict_ms = deque(maxlen=window)
+        self.batches = 0
+        self.requests = 0
+        self.items = 0
+
+    def record(self, batch_size: int, queue_waits_ms: list, predict_ms: float) -> None:
+        with self._lock:
+            self.batches += 1
+            self.requests += len(queue_waits_ms)
+            self.items += batch_size
+            self._batch_sizes.append(batch_size)
+            self._queue_waits_ms.extend(queue_waits_ms)
+            self._predict_ms.append(predict_ms)
+
+    @staticmethod
+    def _percentile(values: list, pct: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def snapshot(self) -> dict:
+        """Return a JSON-serializable summary of the collected statistics."""
+        with self._lock:
+            sizes = list(self._batch_sizes)
+            waits = list(self._queue_waits_ms)
+            predict = list(self._predict_ms)
+            totals = {"batches": self.batches, "requests": self.requests, "items": self.items}
+
+        return {
+            **totals,
+            "batch_size": {
+                "mean": sum(sizes) / len(sizes) if sizes else 0.0,
+                "p50": self._percentile(sizes, 50),
+                "max": max(sizes, default=0),
+            },
+            "queue_wait_ms": {
+                "mean": sum(waits) / len(waits) if waits else 0.0,
+                "p50": self._percentile(waits, 50),
+                "p95": self._percentile(waits, 95),
+                "p99": self._percentile(waits, 99),
+                "max": max(waits, default=0.0),
+            },
+            "predict_ms": {
+                "mean": sum(predict) / len(predict) if predict else 0.0,
+                "p95": self._percentile(predict, 95),
+            },
+        }
+
+
+class MicroBatcher:
+    """
+    Coalesces prediction calls from concurrent requests into micro-batches.
+
+    Callers hand a list of cleaned comments to submit() and block until their
+    own slice of the batch prediction is ready. A single background thread
+    flushes the queue to predict_fn once max_batch_size items are pending or
+    the oldest request has waited max_wait_ms, whichever comes first. A request
+    larger than max_batch_size is flushed on its own and never split.
+    """
+
+    def __init__(self, predict_fn, max_batch_size: int = 512, max_wait_ms: float = 5.0,
+                 stats_window: int = 1000):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must be non-negative")
+
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.stats = BatchStats(window=stats_window)
+
+        self._queue = queue.Queue()
+        self._closed = False
+        # Orders submit()'s enqueue against close(): nothing is queued behind _STOP
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, items: list, timeout: float = None) -> list:
+        """Queue items for prediction and wait for their predictions."""
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        if not items:
+            return []
+
+        request = _BatchRequest(list(items))
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._queue.put(request)
+        if not request.done.wait(timeout):
+            raise TimeoutError(f"Prediction not ready after {timeout}s")
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def close(self, timeout: float = None) -> None:
+        """Flush pending requests and stop the background thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._worker.join(timeout)
+
+    def _run(self) -> None:
+        try:
+            self._batch_loop()
+        finally:
+            # Also reached if the thread dies: fail whatever is left rather than leave callers waiting
+            with self._lock:
+                self._closed = True
+            self._fail_pending(RuntimeError("MicroBatcher is closed"))
+
+    @staticmethod
+    def _fail_batch(batch: list, error: Exception) -> None:
+        for request in batch:
+            request.error = error
+            request.done.set()
+
+    def _fail_pending(self, error: Exception) -> None:
+        pending = []
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is not _STOP:
+                pending.append(request)
+        self._fail_batch(pending, error)
+
+    def _batch_loop(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+
+            batch = [first]
+            size = len(first.items)
+            deadline = first.enqueued_at + self.max_wait
+
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is _STOP:
+                    stopping = True
+                    break
+                batch.append(request)
+                size += len(request.items)
+
+            self._flush(batch, size)
+
+    def _flush(self, batch: list, size: int) -> None:
+        flushed_at = time.monotonic()
+        items = [item for request in batch for item in request.items]
+
+        try:
+            predictions = list(self.predict_fn(items))
+            if len(predictions) != len(items):
+                raise ValueError(f"predict_fn returned {len(predictions)} results for {len(items)} items")
+        except Exception as e:
+            logger.error(f"Batch prediction failed for {len(batch)} request(s): {e}")
+            self._fail_batch(batch, e)
+            return
+        except BaseException as e:
+            # Fail the batch before this thread dies; _run() then fails everything still queued
+            logger.error(f"Batch prediction interrupted for {len(batch)} request(s): {e!r}")
+            error = RuntimeError(f"Batch prediction was interrupted: {e!r}")
+            error.__cause__ = e
+            self._fail_batch(batch, error)
+            raise
+
+        predict_ms = (time.monotonic() - flushed_at) * 1000.0
+        queue_waits_ms = [(flushed_at - request.enqueued_at) * 1000.0 for request in batch]
+        self.stats.record(size, queue_waits_ms, predict_ms)
+
+        offset = 0
+        for request in batch:
+            request.result = predictions[offset:offset + len(request.items)]
+            offset += len(request.items)
+            request.done.set()
+
+        logger.debug(f"Flushed batch of {size} item(s) from {len(batch)} request(s) in {predict_ms:.2f} ms")
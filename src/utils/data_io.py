@@ -0,0 +1,130 @@
+# src/utils/data_io.py
+
+import os
+import time
+import logging
+
+import pandas as pd
+
+# Logger setup
+logger = logging.getLogger("data_io")
+logger.setLevel(logging.DEBUG)
+
+if not logger.handlers:
+    console_handler = logging.StreamHandler()
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    console_handler.setFormatter(formatter)
+    logger.addHandler(console_handler)
+
+SUPPORTED_FORMATS = ("parquet", "csv")
+PARQUET_COMPRESSION = "zstd"
+
+
+def data_file(directory: str, name: str, data_format: str) -> str:
+    """Path of a pipeline data file, e.g. data_file('data/raw', 'train', 'parquet')."""
+    if data_format not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported data format '{data_format}', expected one of {SUPPORTED_FORMATS}")
+    return os.path.join(directory, f"{name}.{data_format}")
+
+
+def _format_of(path: str) -> str:
+    return "parquet" if path.endswith(".parquet") else "csv"
+
+
+def read_frame(path: str, columns: list = None) -> pd.DataFrame:
+    """Read a CSV or Parquet file (chosen by extension) into a DataFrame."""
+    started = time.perf_counter()
+    if _format_of(path) == "parquet":
+        df = pd.read_parquet(path, columns=columns)
+    else:
+        df = pd.read_csv(path, usecols=columns)
+    logger.debug(f"Read {len(df)} rows from {path} in {time.perf_counter() - started:.3f}s")
+    return df
+
+
+def write_frame(df: pd.DataFrame, path: str) -> None:
+    """Write a DataFrame as CSV or compressed Parquet (chosen by extension)."""
+    started = time.perf_counter()
+    if _format_of(path) == "parquet":
+        df.to_parquet(path, index=False, compression=PARQUET_COMPRESSION)
+    else:
+        df.to_csv(path, index=False)
+    logger.debug(
+        f"Wrote {len(df)} rows to {path} ({os.path.getsize(path) / 1e6:.2f} MB) "
+        f"in {time.perf_counter() - started:.3f}s"
+    )
+
+
+def iter_frame_chunks(path: str, chunk_size: int):
+    """Yield a CSV or Parquet file as DataFrames of at most chunk_size rows."""
+    if _format_of(path) == "parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+class FrameWriter:
+    """
+    Appends DataFrame chunks to a single CSV or Parquet file. For Parquet
+    every chunk becomes a row group, cast to `schema` (a pyarrow.Schema) or,
+    if none is given, to the schema of the first chunk that has rows; an
+    empty chunk has no values to infer column types from.
+
+    Use it as a context manager: the file is closed on the way out, and
+    removed if the block raised, so no partial file is left behind.
+    """
+
+    def __init__(self, path: str, schema=None):
+        self.path = path
+        self.rows = 0
+        self._parquet_writer = None
+        self._schema = schema
+        self._empty_chunk = None
+        if os.path.exists(path):
+            os.remove(path)
+
+    def write(self, df: pd.DataFrame) -> None:
+        if _format_of(self.path) == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._schema is None and len(df) == 0:
+                # Kept so that a file with only empty chunks still gets its columns
+                if self._empty_chunk is None:
+                    self._empty_chunk = df
+                return
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            if self._parquet_writer is None:
+                self._schema = table.schema
+                self._parquet_writer = pq.ParquetWriter(self.path, self._schema, compression=PARQUET_COMPRESSION)
+            self._parquet_writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode="a", header=not os.path.exists(self.path), index=False)
+        self.rows += len(df)
+
+    def close(self) -> None:
+        if self._parquet_writer is None and _format_of(self.path) == "parquet":
+            if self._schema is not None:
+                self.write(self._schema.empty_table().to_pandas())
+            elif self._empty_chunk is not None:
+                write_frame(self._empty_chunk, self.path)
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        logger.debug(f"Wrote {self.rows} rows to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+            return
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
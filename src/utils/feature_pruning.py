@@ -0,0 +1,109 @@
+# src/utils/feature_pruning.py
+
+import copy
+import logging
+
+import numpy as np
+import lightgbm as lgb
+from scipy.sparse import csr_matrix
+
+logger = logging.getLogger("feature_pruning")
+
+
+def used_features(booster: lgb.Booster) -> np.ndarray:
+    """Sorted indices of the features any tree in the booster splits on."""
+    used = set()
+    for line in booster.model_to_string().split("\n"):
+        if line.startswith("split_feature="):
+            used.update(int(index) for index in line[len("split_feature="):].split())
+    return np.array(sorted(used), dtype=np.int64)
+
+
+def remap_booster(booster: lgb.Booster, keep: np.ndarray) -> lgb.Booster:
+    """
+    Rewrite a booster to take only the columns in `keep` (sorted original
+    indices) as input: split features are renumbered, the per-feature header
+    entries are sliced and feature importances renamed. Thresholds and leaf
+    values are untouched, so predictions on X[:, keep] equal those on X.
+    """
+    new_index = {int(old): new for new, old in enumerate(keep)}
+    lines = booster.model_to_string().split("\n")
+    output = []
+    in_importances = False
+    for line in lines:
+        if line.startswith("max_feature_idx="):
+            line = f"max_feature_idx={len(keep) - 1}"
+        elif line.startswith("feature_names="):
+            names = line[len("feature_names="):].split(" ")
+            line = "feature_names=" + " ".join(f"Column_{new}" if names[old].startswith("Column_") else names[old]
+                                               for new, old in enumerate(keep))
+        elif line.startswith("feature_infos="):
+            infos = line[len("feature_infos="):].split(" ")
+            line = "feature_infos=" + " ".join(infos[old] for old in keep)
+        elif line.startswith("tree_sizes="):
+            # Tree byte sizes change with the renumbering; LightGBM parses sequentially without them
+            continue
+        elif line.startswith("split_feature="):
+            line = "split_feature=" + " ".join(
+                str(new_index[int(index)]) for index in line[len("split_feature="):].split()
+            )
+        elif line == "feature_importances:":
+            in_importances = True
+        elif in_importances:
+            if not line or line.startswith("parameters:"):
+                in_importances = False
+            else:
+                name, _, count = line.rpartition("=")
+                old = int(name.rpartition("_")[2])
+                line = f"Column_{new_index[old]}={count}"
+        output.append(line)
+
+    return lgb.Booster(model_str="\n".join(output))
+
+
+class PrunedVectorizer:
+    """
+    Wraps a fitted vectorizer and returns only the columns the model uses.
+
+    Rows are still l2-normalized over the full vocabulary, since the trees'
+    thresholds were learned on those values, so transform() runs the full
+    vectorizer and then drops columns: it is not faster than the unpruned
+    vectorizer. The saving is in the width of every matrix downstream and in
+    the artifact, which no longer carries the TfidfVectorizer's stop_words_
+    set of all n-grams cut by max_features. The caller's vectorizer is left
+    unchanged.
+    """
+
+    def __init__(self, vectorizer, keep: np.ndarray):
+        if hasattr(vectorizer, "stop_words_"):
+            vectorizer = copy.copy(vectorizer)
+            del vectorizer.stop_words_
+        self.vectorizer = vectorizer
+        self.keep_ = np.asarray(keep, dtype=np.int64)
+
+    def select(self, X):
+        """Keep the model's columns of a matrix produced by the wrapped vectorizer."""
+        X = X.tocsr()
+        columns = np.searchsorted(self.keep_, X.indices)
+        kept = self.keep_[np.minimum(columns, len(self.keep_) - 1)] == X.indices
+        indptr = np.concatenate([[0], np.cumsum(kept)])[X.indptr]
+        return csr_matrix((X.data[kept], columns[kept], indptr), shape=(X.shape[0], len(self.keep_)))
+
+    def transform(self, texts):
+        return self.select(self.vectorizer.transform(texts))
+
+    def get_feature_names_out(self) -> np.ndarray:
+        return np.asarray(self.vectorizer.get_feature_names_out())[self.keep_]
+
+
+def prune_model(model, vectorizer) -> tuple:
+    """
+    Return (pruned booster, PrunedVectorizer) for a fitted LightGBM model and
+    its vectorizer, keeping only the features the trees split on.
+    """
+    booster = model.booster_
+    keep = used_features(booster)
+    if len(keep) == 0:
+        keep = np.array([0], dtype=np.int64)
+    logger.info(f"Model splits on {len(keep)} of {booster.num_feature()} features")
+    return remap_booster(booster, keep), PrunedVectorizer(vectorizer, keep)
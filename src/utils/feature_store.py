@@ -0,0 +1,163 @@
+# src/utils/feature_store.py
+
+import os
+import json
+import hashlib
+import logging
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+from src.utils.data_io import data_file
+
+logger = logging.getLogger("feature_store")
+
+# Bump when the way features are computed changes, to invalidate old caches
+FEATURE_FORMAT_VERSION = 1
+
+# params.yaml entries (section, key) that determine the feature matrices
+FEATURE_PARAMS = [
+    ("features", "mode"),
+    ("features", "n_features"),
+    ("model_building", "max_features"),
+    ("model_building", "ngram_range"),
+]
+
+
+def feature_params(params: dict) -> dict:
+    """Pick the parameters that affect feature extraction out of params.yaml."""
+    return {f"{section}.{key}": params[section][key] for section, key in FEATURE_PARAMS}
+
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's contents, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def features_key(params: dict, data_paths: list) -> str:
+    """
+    Cache key for a set of feature matrices: a hash of the feature
+    parameters and the contents of the input data files.
+    """
+    payload = {
+        "version": FEATURE_FORMAT_VERSION,
+        "params": feature_params(params),
+        "data": [file_digest(path) for path in data_paths],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def interim_paths(root_dir: str, params: dict) -> tuple:
+    """Paths of the preprocessed (train, test) files the features are built from."""
+    interim_dir = os.path.join(root_dir, "data/interim")
+    data_format = params["data_io"]["format"]
+    return (
+        data_file(interim_dir, "train_processed", data_format),
+        data_file(interim_dir, "test_processed", data_format),
+    )
+
+
+def pipeline_features_key(root_dir: str, params: dict) -> str:
+    """
+    Key of the data/processed features for the current pipeline state. In
+    incremental mode the features come from the registered vectorizer rather
+    than a fresh fit, so its pickle is hashed in as well.
+    """
+    paths = list(interim_paths(root_dir, params))
+    if params["incremental"]["enabled"]:
+        paths.append(os.path.join(root_dir, "tfidf_vectorizer.pkl"))
+    return features_key(params, paths)
+
+
+def save_features(path: str, X, y, key: str) -> None:
+    """Write a sparse feature matrix and its labels to one compressed .npz file."""
+    X = csr_matrix(X)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.savez_compressed(
+        path,
+        data=X.data,
+        indices=X.indices,
+        indptr=X.indptr,
+        shape=np.array(X.shape),
+        labels=np.asarray(y),
+        key=np.array(key),
+    )
+    logger.debug(f"Saved features {X.shape} to {path}")
+
+
+def stored_features_key(path: str):
+    """
+    The key feature_building saved with a features file, or None if it is
+    missing. Downstream stages use it instead of re-hashing the interim data,
+    which they do not depend on.
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path, allow_pickle=False) as npz:
+        return str(npz["key"])
+
+
+def load_features(path: str, key: str = None):
+    """
+    Load (X, y) saved by save_features. Returns None if the file is missing
+    or, when a key is given, was built from different params or data.
+    """
+    if not os.path.exists(path):
+        return None
+
+    with np.load(path, allow_pickle=False) as npz:
+        if key is not None and str(npz["key"]) != key:
+            logger.info(f"Cached features at {path} are stale")
+            return None
+        X = csr_matrix((npz["data"], npz["indices"], npz["indptr"]), shape=tuple(npz["shape"]))
+        y = npz["labels"]
+
+    logger.debug(f"Loaded features {X.shape} from {path}")
+    return X, y
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """Content hash of each labelled training row, stable across reorderings."""
+    return pd.util.hash_pandas_object(
+        df[["clean_comment", "category"]].astype({"clean_comment": object}), index=False
+    ).to_numpy(dtype=np.uint64)
+
+
+def model_fingerprint(booster) -> str:
+    """
+    SHA-256 of a LightGBM booster's trees. It is the same for a model and
+    its registered copy, so it identifies which model a watermark belongs to.
+    """
+    text = booster.model_to_string()
+    end = text.find("end of trees")
+    return hashlib.sha256(text[:end if end >= 0 else len(text)].encode("utf-8")).hexdigest()
+
+
+def load_watermark(path: str, model_id: str = None):
+    """
+    Load the incremental-training watermark: the row hashes the current model
+    has been trained on. Returns None if no watermark has been written yet
+    or, when model_id is given, it was written for a different model.
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path, allow_pickle=False) as npz:
+        stored_id = str(npz["model_id"]) if "model_id" in npz.files else None
+        if model_id is not None and stored_id != model_id:
+            logger.warning(f"Watermark at {path} belongs to another model; resetting it")
+            return None
+        return npz["hashes"]
+
+
+def save_watermark(path: str, hashes: np.ndarray, model_id: str = "") -> None:
+    """Write the sorted, de-duplicated row hashes a model was trained on, tagged with the model."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    hashes = np.unique(hashes)
+    with open(path, "wb") as f:
+        np.savez(f, hashes=hashes, model_id=np.array(model_id))
+    logger.debug(f"Watermark at {path} now covers {len(hashes)} training rows")
@@ -0,0 +1,89 @@
+# src/utils/hashing_features.py
+
+import logging
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from src.utils.text_analyzer import CommentAnalyzer
+
+logger = logging.getLogger("hashing_features")
+
+
+class HashingTfidfVectorizer:
+    """
+    TF-IDF over hashed n-grams: a stateless HashingVectorizer for the term
+    counts plus a separately fitted IDF weight array, one entry per bucket.
+
+    There is no vocabulary, so transform() needs nothing but the IDF array,
+    document frequencies from different chunks or processes simply add up
+    (partial_fit), and the pickled object stays a few hundred KB regardless
+    of corpus size. Weights follow TfidfVectorizer's defaults: raw counts,
+    smoothed IDF, l2-normalized rows.
+    """
+
+    def __init__(self, n_features: int = 2 ** 14, ngram_range: tuple = (1, 1)):
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self.hasher = HashingVectorizer(
+            n_features=n_features,
+            analyzer=CommentAnalyzer(self.ngram_range),
+            token_pattern=None,
+            alternate_sign=False,
+            norm=None,
+        )
+        self.doc_freqs_ = np.zeros(n_features, dtype=np.int64)
+        self.n_docs_ = 0
+        self.idf_ = None
+
+    def partial_fit(self, texts):
+        """Accumulate document frequencies from one chunk of texts."""
+        counts = self.hasher.transform(texts).tocsr()
+        self.doc_freqs_ += np.bincount(counts.indices, minlength=self.n_features)
+        self.n_docs_ += counts.shape[0]
+        self.idf_ = np.log((self.n_docs_ + 1) / (self.doc_freqs_ + 1)) + 1
+        return self
+
+    def merge(self, other: "HashingTfidfVectorizer"):
+        """Add the document frequencies fitted by another instance (e.g. another process)."""
+        if (other.n_features, other.ngram_range) != (self.n_features, self.ngram_range):
+            raise ValueError("Cannot merge hashing vectorizers with different n_features or ngram_range.")
+        self.doc_freqs_ += other.doc_freqs_
+        self.n_docs_ += other.n_docs_
+        self.idf_ = np.log((self.n_docs_ + 1) / (self.doc_freqs_ + 1)) + 1
+        return self
+
+    def fit(self, texts):
+        self.doc_freqs_ = np.zeros(self.n_features, dtype=np.int64)
+        self.n_docs_ = 0
+        return self.partial_fit(texts)
+
+    def transform(self, texts):
+        if self.idf_ is None:
+            raise ValueError("HashingTfidfVectorizer is not fitted; call fit or partial_fit first.")
+        counts = self.hasher.transform(texts).tocsr()
+        counts.data = counts.data * self.idf_[counts.indices]
+        return normalize(counts, norm="l2", copy=False)
+
+    def fit_transform(self, texts):
+        return self.fit(texts).transform(texts)
+
+    def get_feature_names_out(self) -> np.ndarray:
+        return np.array([f"hash_{i}" for i in range(self.n_features)], dtype=object)
+
+    def __getstate__(self):
+        # The hasher is rebuilt from n_features/ngram_range; only the IDF array is state
+        state = self.__dict__.copy()
+        del state["hasher"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.hasher = HashingVectorizer(
+            n_features=self.n_features,
+            analyzer=CommentAnalyzer(self.ngram_range),
+            token_pattern=None,
+            alternate_sign=False,
+            norm=None,
+        )
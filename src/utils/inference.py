@@ -1,15 +1,17 @@
 #src/utils inference.py (Fully Updated)
 
 import os
+import hashlib
 import logging
 import pickle
-import mlflow
-import mlflow.pyfunc
+import weakref
 import numpy as np
 import pandas as pd
-from scipy.sparse import csr_matrix
+from scipy.sparse import csr_matrix, issparse
 from dotenv import load_dotenv
 from src.utils.preprocessing import preprocess_comments_list
+from src.utils.text_analyzer import text_analyzer
+from src.utils.serving_bundle import BundleModel
 
 # Load .env
 load_dotenv(override=True)
@@ -29,11 +31,28 @@ if not logger.handlers:
     logger.addHandler(console_handler)
     logger.addHandler(file_handler)
 
-def load_model_and_artifacts(model_name: str, stage: str = "Staging"):
+def load_model_and_artifacts(model_name: str, stage: str = "Staging", use_cache: bool = True):
+    """
+    Load the registered model in `stage` and its vectorizer. With use_cache
+    the artifacts come from the local RegistryCache (MODEL_CACHE_DIR), which
+    only asks the registry which version is current.
+    """
+    # Imported here so that serving from a bundle never loads MLflow
+    import mlflow
+    import mlflow.pyfunc
+
     try:
         tracking_uri = os.getenv("MLFLOW_SERVER_TRACKING_URI_EC2")
         mlflow.set_tracking_uri(tracking_uri)
 
+        if use_cache:
+            from src.utils.registry_cache import RegistryCache
+
+            cache = RegistryCache()
+            entry_path = cache.fetch(model_name, stage)
+            logger.info(f"Loading model and vectorizer from cache: {entry_path}")
+            return cache.load(entry_path)
+
         model_uri = f"models:/{model_name}/{stage}"
         logger.info(f"Loading model from: {model_uri}")
         model = mlflow.pyfunc.load_model(model_uri)
@@ -65,37 +84,215 @@ def load_model_and_artifacts(model_name: str, stage: str = "Staging"):
         logger.error(f"Model/vectorizer loading failed: {e}")
         raise
 
-def predict_sentiment(comments: list, model, vectorizer):
+class SparseScorer:
+    """
+    Scores sparse TF-IDF rows directly with the LightGBM booster behind a model,
+    skipping the dense DataFrame and pyfunc schema enforcement.
+    """
+
+    def __init__(self, model, dtype=np.float32):
+        estimator = _resolve_lgbm_estimator(model)
+        if estimator is None:
+            raise ValueError("Sparse scoring requires a fitted LightGBM classifier.")
+
+        self.booster = estimator.booster_
+        self.classes = np.asarray(estimator.classes_)
+        self.dtype = dtype
+
+        # Feature count is checked once here against the signature, not per request
+        self.n_features = _signature_feature_count(model) or self.booster.num_feature()
+        if self.booster.num_feature() != self.n_features:
+            raise ValueError(
+                f"Feature mismatch: Model expects {self.n_features} columns, "
+                f"but booster was trained on {self.booster.num_feature()}"
+            )
+
+    def predict(self, X):
+        """Predict class labels for a sparse (or dense) feature matrix."""
+        if X.shape[1] != self.n_features:
+            raise ValueError(
+                f"Feature mismatch: Model expects {self.n_features} columns, "
+                f"but got {X.shape[1]}"
+            )
+        X = csr_matrix(X, dtype=self.dtype)
+        probabilities = self.booster.predict(X)
+        return self.classes[np.argmax(probabilities, axis=1)]
+
+
+# Keyed by id(): PyFuncModel defines __eq__ without __hash__, so it cannot key a
+# WeakKeyDictionary. Entries are dropped by weakref.finalize when the model goes away.
+# Models that cannot be scored sparsely map to the reason, so the check runs once.
+_sparse_scorers = {}
+
+
+def _resolve_lgbm_estimator(model):
+    """Return the fitted LightGBM classifier wrapped by a pyfunc model, if any."""
+    if hasattr(model, "booster_"):
+        return model
     try:
-        logger.debug(f"Raw input comments: {comments}")
-        cleaned = preprocess_comments_list(comments)
-        logger.debug(f"Preprocessed comments: {cleaned}")
+        raw_model = model.get_raw_model()
+    except (AttributeError, NotImplementedError):
+        return None
+    return raw_model if hasattr(raw_model, "booster_") else None
+
+
+def _signature_feature_count(model):
+    """Number of input columns declared in the model signature, or None."""
+    metadata = getattr(model, "metadata", None)
+    signature = getattr(metadata, "signature", None)
+    if signature is None or signature.inputs is None:
+        return None
+    return len(signature.inputs.inputs)
+
+
+def get_sparse_scorer(model) -> SparseScorer:
+    """
+    Return the cached SparseScorer for a model, building it on first use.
+    Raises ValueError (the same one on every call) for models it cannot score.
+    """
+    if isinstance(model, BundleModel):
+        return model
+    key = id(model)
+    scorer = _sparse_scorers.get(key)
+    if scorer is None:
+        try:
+            scorer = SparseScorer(model)
+        except ValueError as e:
+            scorer = str(e)
+            logger.warning(f"Sparse scoring unavailable for this model, using pyfunc: {e}")
+        _sparse_scorers[key] = scorer
+        weakref.finalize(model, _sparse_scorers.pop, key, None)
+    if isinstance(scorer, str):
+        raise ValueError(scorer)
+    return scorer
+
+
+def _predict_dense(model, vectorized):
+    """Score through pyfunc with a named DataFrame (enforces the model schema)."""
+    if issparse(vectorized):
+        vectorized = vectorized.toarray()
+
+    # Handle schema enforcement
+    if hasattr(model.metadata, "signature") and model.metadata.signature:
+        input_schema = model.metadata.signature.inputs
+        col_names = [col.name for col in input_schema.inputs]
+        logger.debug(f"Model expects columns: {col_names}")
 
-        vectorized = vectorizer.transform(cleaned)
-        if isinstance(vectorized, csr_matrix):
-            vectorized = vectorized.toarray()
+        if len(col_names) != vectorized.shape[1]:
+            raise ValueError(
+                f"Feature mismatch: Model expects {len(col_names)} columns, "
+                f"but got {vectorized.shape[1]}"
+            )
 
-        logger.debug(f"Vectorized input shape: {vectorized.shape}")
-        logger.debug(f"Vectorized input type: {type(vectorized)}")
+        input_df = pd.DataFrame(vectorized, columns=col_names)
+    else:
+        input_df = pd.DataFrame(vectorized)
 
-        # Handle schema enforcement
-        if hasattr(model.metadata, "signature") and model.metadata.signature:
-            input_schema = model.metadata.signature.inputs
-            col_names = [col.name for col in input_schema.inputs]
-            logger.debug(f"Model expects columns: {col_names}")
+    return model.predict(input_df)
 
-            if len(col_names) != vectorized.shape[1]:
-                raise ValueError(
-                    f"Feature mismatch: Model expects {len(col_names)} columns, "
-                    f"but got {vectorized.shape[1]}"
-                )
 
-            input_df = pd.DataFrame(vectorized, columns=col_names)
+def predict_cleaned(cleaned: list, model, vectorizer, sparse: bool = True):
+    """Vectorize already-preprocessed comments (or analyzer token lists) and return predicted labels."""
+    vectorized = vectorizer.transform(cleaned)
+    logger.debug(f"Vectorized input shape: {vectorized.shape}")
+    logger.debug(f"Vectorized input type: {type(vectorized)}")
+
+    scorer = None
+    if sparse:
+        try:
+            scorer = get_sparse_scorer(model)
+        except ValueError:
+            pass  # logged once by get_sparse_scorer
+
+    if scorer is not None:
+        return scorer.predict(vectorized)
+    return _predict_dense(model, vectorized)
+
+
+# Keyed by id() like _sparse_scorers: pyfunc models are unhashable
+_model_versions = {}
+
+
+def get_model_version(model) -> str:
+    """
+    Stable identifier of a model for cache keys: the MLflow run_id for pyfunc
+    models, the recorded version for serving bundles, otherwise a hash of the
+    LightGBM booster.
+    """
+    if isinstance(model, BundleModel):
+        return model.version
+
+    run_id = getattr(getattr(model, "metadata", None), "run_id", None)
+    if run_id:
+        return run_id
+
+    version = _model_versions.get(id(model))
+    if version is None:
+        estimator = _resolve_lgbm_estimator(model)
+        if estimator is None:
+            raise ValueError("Cannot derive a version for this model; pass model_version explicitly.")
+        version = hashlib.sha256(estimator.booster_.model_to_string().encode("utf-8")).hexdigest()[:16]
+        _model_versions[id(model)] = version
+        weakref.finalize(model, _model_versions.pop, id(model), None)
+    return version
+
+
+def predict_sentiment(comments: list, model, vectorizer, sparse: bool = True, batcher=None,
+                      cache=None, model_version: str = None):
+    """
+    Predict sentiment labels for raw comments.
+
+    With sparse=True the CSR TF-IDF matrix goes straight to the LightGBM
+    booster; otherwise it is densified and scored through pyfunc. When a
+    MicroBatcher is given, the cleaned comments are queued on it and scored
+    together with those of concurrent callers.
+
+    Repeated comments are preprocessed and scored once per call. With a
+    PredictionCache, predictions are also looked up by cleaned text and
+    model version before anything is vectorized.
+
+    Vectorizers built on CommentAnalyzer take each raw comment to its tokens
+    in one pass; the tokens go to the vectorizer as-is and their joined form
+    stands in for the cleaned text.
+    """
+    try:
+        logger.debug(f"Raw input comments: {comments}")
+        unique_comments = list(dict.fromkeys(comments))
+        analyzer = text_analyzer(vectorizer)
+        if analyzer is not None:
+            tokens_by_cleaned = {}
+            cleaned_by_comment = {}
+            for comment in unique_comments:
+                tokens = analyzer.tokens(comment)
+                cleaned = " ".join(tokens)
+                cleaned_by_comment[comment] = cleaned
+                tokens_by_cleaned[cleaned] = tokens
+        else:
+            tokens_by_cleaned = None
+            cleaned_by_comment = dict(zip(unique_comments, preprocess_comments_list(unique_comments)))
+        logger.debug(f"Preprocessed comments: {cleaned_by_comment}")
+
+        unique_cleaned = list(dict.fromkeys(cleaned_by_comment.values()))
+        if cache is not None:
+            model_version = model_version or get_model_version(model)
+            known = cache.get_many(unique_cleaned, model_version)
         else:
-            input_df = pd.DataFrame(vectorized)
+            known = {}
+
+        missing = [c for c in unique_cleaned if c not in known]
+        if missing:
+            inputs = missing if tokens_by_cleaned is None else [tokens_by_cleaned[c] for c in missing]
+            if batcher is not None:
+                predictions = batcher.submit(inputs)
+            else:
+                predictions = predict_cleaned(inputs, model, vectorizer, sparse=sparse)
+            fresh = dict(zip(missing, predictions))
+            known.update(fresh)
+            if cache is not None:
+                cache.put_many(fresh, model_version)
 
-        predictions = model.predict(input_df)
-        return list(zip(comments, predictions))
+        logger.debug(f"Scored {len(missing)} of {len(comments)} comment(s); rest were repeats or cached")
+        return [(comment, known[cleaned_by_comment[comment]]) for comment in comments]
 
     except Exception as e:
         logger.error(f"Prediction failed: {e}")
@@ -0,0 +1,240 @@
+# src/utils/jobs.py
+
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.cache import TTLCache, SQLiteCache
+
+logger = logging.getLogger("jobs")
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+
+class JobQueueFull(RuntimeError):
+    """Raised by JobManager.submit when max_pending jobs are already queued or running."""
+
+
+class Job:
+    """
+    State of one background job. The job function reports progress with
+    update(); every update bumps `revision` and wakes threads blocked in
+    wait_for_change(), which is what the event stream listens on.
+    """
+
+    def __init__(self, job_id: str, params: dict):
+        self.id = job_id
+        self.params = params
+        self.state = QUEUED
+        self.stage = None
+        self.progress = {"done": 0, "total": None}
+        self.counts = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.revision = 0
+        self._changed = threading.Condition()
+        self._listeners = []
+
+    def update(self, **fields) -> None:
+        """Set any of state, stage, progress, counts, result, error and notify listeners."""
+        with self._changed:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.updated_at = time.time()
+            self.revision += 1
+            self._changed.notify_all()
+        for listener in self._listeners:
+            listener(self)
+
+    def wait_for_change(self, revision: int, timeout: float) -> int:
+        """Block until the revision moves past `revision` or timeout; returns the current revision."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.revision != revision, timeout)
+            return self.revision
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED
+
+    def snapshot(self) -> dict:
+        with self._changed:
+            return {
+                "id": self.id,
+                "state": self.state,
+                "stage": self.stage,
+                "progress": dict(self.progress),
+                "counts": dict(self.counts),
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at,
+                "updated_at": self.updated_at,
+                "revision": self.revision,
+            }
+
+
+class ProgressRelay:
+    """
+    Stands in for a Job as the reporting target of a run that several
+    callers share: every update() is forwarded to the jobs attached so far,
+    and a job attached mid-run is first brought up to the latest fields.
+    """
+
+    def __init__(self, job: Job = None):
+        self.jobs = [job] if job is not None else []
+        self.latest = {}
+        self._lock = threading.Lock()
+
+    def attach(self, job: Job) -> None:
+        with self._lock:
+            self.jobs.append(job)
+            if self.latest:
+                job.update(**self.latest)
+
+    def update(self, **fields) -> None:
+        with self._lock:
+            self.latest.update(fields)
+            for job in self.jobs:
+                job.update(**fields)
+
+
+class JobManager:
+    """
+    Runs job functions on a bounded thread pool and keeps their state.
+
+    submit(fn, **params) returns a Job at once; fn(job=job, **params) runs on one
+    of max_workers threads and reports through job.update(). At most
+    max_pending jobs may be queued or running; beyond that submit raises
+    JobQueueFull so callers can shed load instead of queueing without bound.
+    A submit with the key of a job still queued or running returns that job
+    instead of starting another.
+    Finished jobs are kept for ttl_seconds. With sqlite_path, job snapshots
+    are mirrored to a SQLite file so any worker process can report on a job
+    started by another.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 64, ttl_seconds: float = 3600,
+                 sqlite_path: str = None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.jobs = TTLCache(max_entries=max(max_pending, 1000), ttl_seconds=ttl_seconds)
+        self.disk = SQLiteCache(sqlite_path, ttl_seconds=ttl_seconds, table="jobs") if sqlite_path else None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._active = {}  # key -> unfinished Job
+        self.pending = 0
+        self.submitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, fn, key=None, **params) -> Job:
+        with self._lock:
+            if key is not None and key in self._active:
+                self.coalesced += 1
+                return self._active[key]
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise JobQueueFull(f"{self.pending} jobs already pending (limit {self.max_pending}).")
+            self.pending += 1
+            self.submitted += 1
+
+            job = Job(uuid.uuid4().hex, params)
+            if key is not None:
+                self._active[key] = job
+
+        if self.disk is not None:
+            job._listeners.append(self._persist)
+            self._persist(job)
+        self.jobs.set(job.id, job)
+        self._executor.submit(self._run, job, fn, key)
+        return job
+
+    def _persist(self, job: Job) -> None:
+        try:
+            self.disk.set(job.id, job.snapshot())
+        except Exception as e:
+            logger.error(f"Failed to persist job {job.id}: {e}")
+
+    def _run(self, job: Job, fn, key=None) -> None:
+        started = time.perf_counter()
+        try:
+            job.update(state=RUNNING)
+            result = fn(job=job, **job.params)
+            job.update(state=DONE, stage=None, result=result)
+            with self._lock:
+                self.completed += 1
+            logger.info(f"Job {job.id} finished in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            logger.exception(f"Job {job.id} failed.")
+            job.update(state=FAILED, error=str(e))
+            with self._lock:
+                self.failed += 1
+        finally:
+            with self._lock:
+                self.pending -= 1
+                if key is not None:
+                    self._active.pop(key, None)
+
+    def get(self, job_id: str):
+        """The snapshot of a job, from this process or the SQLite mirror; None if unknown."""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.snapshot()
+        if self.disk is not None:
+            return self.disk.get(job_id)
+        return None
+
+    def watch(self, job_id: str, timeout: float = 15.0, poll_interval: float = 0.5):
+        """
+        Yield a job's snapshot now and after every change until it finishes.
+        Yields None when nothing changed for `timeout` seconds, so streaming
+        callers can send a keep-alive. Jobs running in another process are polled.
+        """
+        job = self.jobs.get(job_id)
+        if job is not None:
+            revision = job.revision
+            yield job.snapshot()
+            while not job.finished:
+                current = job.wait_for_change(revision, timeout)
+                yield job.snapshot() if current != revision else None
+                revision = current
+            return
+
+        snapshot, waited = self.get(job_id), 0.0
+        if snapshot is None:
+            return
+        yield snapshot
+        while snapshot["state"] not in FINISHED:
+            time.sleep(poll_interval)
+            waited += poll_interval
+            latest = self.get(job_id)
+            if latest is None:
+                return
+            if latest["revision"] != snapshot["revision"]:
+                snapshot, waited = latest, 0.0
+                yield snapshot
+            elif waited >= timeout:
+                waited = 0.0
+                yield None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "submitted": self.submitted,
+                "coalesced": self.coalesced,
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
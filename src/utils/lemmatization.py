@@ -0,0 +1,153 @@
+# src/utils/lemmatization.py
+
+import os
+import gzip
+import time
+import logging
+import argparse
+from collections import Counter
+from functools import lru_cache
+
+import nltk
+from nltk.stem import WordNetLemmatizer
+
+# Logger setup
+logger = logging.getLogger("lemmatization")
+logger.setLevel(logging.INFO)
+
+if not logger.handlers:
+    console_handler = logging.StreamHandler()
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    console_handler.setFormatter(formatter)
+    logger.addHandler(console_handler)
+
+DEFAULT_TABLE_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../lemma_table.tsv.gz")
+)
+
+
+class LemmaCache:
+    """
+    Two-level lemma lookup in front of WordNetLemmatizer.
+
+    A precomputed token -> lemma table (built offline from the training
+    vocabulary) answers most tokens with a dict lookup; everything else goes
+    through a bounded LRU memo and only reaches WordNet's morphy on a miss.
+    """
+
+    def __init__(self, table: dict = None, max_entries: int = 100000, lemmatizer=None):
+        self.table = table or {}
+        self.lemmatizer = lemmatizer or WordNetLemmatizer()
+        self.table_hits = 0
+        self.wordnet_lookups = 0
+        self.wordnet_seconds = 0.0
+        self._memo = lru_cache(maxsize=max_entries)(self._lookup)
+
+    def _lookup(self, word: str) -> str:
+        started = time.perf_counter()
+        lemma = self.lemmatizer.lemmatize(word)
+        self.wordnet_seconds += time.perf_counter() - started
+        self.wordnet_lookups += 1
+        return lemma
+
+    def lemmatize(self, word: str) -> str:
+        lemma = self.table.get(word)
+        if lemma is not None:
+            self.table_hits += 1
+            return lemma
+        return self._memo(word)
+
+    def stats(self) -> dict:
+        memo = self._memo.cache_info()
+        lookups = self.table_hits + memo.hits + memo.misses
+        return {
+            "table_entries": len(self.table),
+            "table_hits": self.table_hits,
+            "memo_entries": memo.currsize,
+            "memo_hits": memo.hits,
+            "wordnet_lookups": self.wordnet_lookups,
+            "hit_rate": (self.table_hits + memo.hits) / lookups if lookups else 0.0,
+            "wordnet_lookup_us_mean": (
+                self.wordnet_seconds / self.wordnet_lookups * 1e6 if self.wordnet_lookups else 0.0
+            ),
+        }
+
+
+def build_lemma_table(tokens, lemmatizer=None, max_entries: int = None, min_count: int = 1) -> dict:
+    """Lemmatize the most frequent tokens of a corpus into a token -> lemma dict."""
+    lemmatizer = lemmatizer or WordNetLemmatizer()
+    counts = Counter(tokens)
+    vocabulary = [t for t, c in counts.most_common(max_entries) if c >= min_count]
+    return {token: lemmatizer.lemmatize(token) for token in vocabulary}
+
+
+def save_lemma_table(table: dict, path: str) -> None:
+    """
+    Write the table as gzipped TSV. Tokens that are their own lemma are
+    written without a second column to keep the artifact compact.
+    """
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(f"# nltk={nltk.__version__}\n")
+        for token, lemma in table.items():
+            f.write(f"{token}\n" if token == lemma else f"{token}\t{lemma}\n")
+    logger.info(f"Saved lemma table with {len(table)} entries to {path}")
+
+
+def load_lemma_table(path: str = DEFAULT_TABLE_PATH) -> dict:
+    """
+    Load a table written by save_lemma_table. Returns an empty table if the
+    file is missing or was built with a different NLTK version.
+    """
+    if not os.path.exists(path):
+        logger.info(f"No lemma table at {path}; using the in-memory memo only")
+        return {}
+
+    table = {}
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = f.readline().strip()
+        if header != f"# nltk={nltk.__version__}":
+            logger.warning(f"Ignoring lemma table {path}: built with '{header}', running nltk={nltk.__version__}")
+            return {}
+        for line in f:
+            token, _, lemma = line.rstrip("\n").partition("\t")
+            table[token] = lemma or token
+
+    logger.info(f"Loaded lemma table with {len(table)} entries from {path}")
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the precomputed lemma table from a training corpus.")
+    parser.add_argument("corpus", help="CSV or Parquet file with a clean_comment column, e.g. data/raw/train.parquet")
+    parser.add_argument("--output", default=DEFAULT_TABLE_PATH, help="Where to write the gzipped TSV table")
+    parser.add_argument("--max-entries", type=int, default=None, help="Keep only the N most frequent tokens")
+    parser.add_argument("--min-count", type=int, default=1, help="Drop tokens seen fewer times than this")
+    args = parser.parse_args()
+
+    # First pipeline stage to need NLTK data: fetch it before preprocessing is imported
+    from src.utils.nltk_resources import ensure_resources
+    ensure_resources(download=True)
+
+    from src.utils.data_io import read_frame
+    from src.utils.preprocessing import clean_tokens
+
+    comments = read_frame(args.corpus, columns=["clean_comment"])["clean_comment"].dropna().astype(str)
+    tokens = (token for comment in comments for token in clean_tokens(comment))
+    table = build_lemma_table(tokens, max_entries=args.max_entries, min_count=args.min_count)
+    save_lemma_table(table, args.output)
+
+    # Report how the table performs on the corpus it was built from
+    cache = LemmaCache(table=table)
+    started = time.perf_counter()
+    lookups = 0
+    for comment in comments:
+        for token in clean_tokens(comment):
+            cache.lemmatize(token)
+            lookups += 1
+    elapsed = time.perf_counter() - started
+    logger.info(f"Lemma cache stats: {cache.stats()}")
+    logger.info(f"Mean lookup time: {elapsed / lookups * 1e6 if lookups else 0.0:.3f} us over {lookups} tokens")
+
+
+if __name__ == "__main__":
+    main()
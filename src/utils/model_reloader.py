@@ -0,0 +1,209 @@
+# src/utils/model_reloader.py
+
+import os
+import time
+import logging
+import threading
+import contextlib
+
+from src.utils.inference import predict_sentiment, get_model_version
+
+logger = logging.getLogger("model_reloader")
+
+# Synthetic batch run through a freshly loaded model before it takes traffic
+WARMUP_COMMENTS = [
+    "This video is amazing, I loved every minute of it!",
+    "Worst tutorial I have ever watched, not helpful at all.",
+    "It was okay I guess",
+    "Can you make a part 2? The explanation at 5:30 was great 👍",
+    "meh",
+]
+
+
+class BundleSource:
+    """Serving bundles under a bundle root; a new version is a repointed CURRENT file."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def probe(self) -> str:
+        from src.utils.serving_bundle import resolve_bundle_path
+        return resolve_bundle_path(self.path)
+
+    def load(self, token: str) -> tuple:
+        from src.utils.serving_bundle import load_bundle
+        return load_bundle(token)
+
+
+class RegistrySource:
+    """The model version in a registry stage, loaded through the local registry cache."""
+
+    def __init__(self, model_name: str, stage: str = "Staging"):
+        import mlflow
+        from src.utils.registry_cache import RegistryCache
+
+        mlflow.set_tracking_uri(os.getenv("MLFLOW_SERVER_TRACKING_URI_EC2"))
+        self.model_name = model_name
+        self.stage = stage
+        self.cache = RegistryCache()
+
+    def probe(self) -> str:
+        """"<version>-<run_id>" in the stage, or the cached one for it if the registry is down."""
+        try:
+            model_version = self.cache.resolve(self.model_name, self.stage)
+            return f"{model_version.version}-{model_version.run_id}"
+        except Exception as e:
+            recorded = self.cache.stage_version(self.model_name, self.stage)
+            if recorded is None:
+                raise
+            logger.warning(f"Registry lookup failed ({e}); using cached {self.model_name} v{recorded[0]}")
+            return "-".join(recorded)
+
+    def load(self, token: str) -> tuple:
+        """The exact version named by a probe() token, not whatever the stage holds by now."""
+        version, run_id = token.split("-", 1)
+        path = self.cache.fetch_version(self.model_name, version, run_id)
+        self.cache.record_stage(self.model_name, self.stage, version, run_id)
+        return self.cache.load(path)
+
+
+class ServingModel:
+    """A loaded model, its vectorizer and version, and the batcher scoring with it."""
+
+    def __init__(self, model, vectorizer, token: str, batcher=None):
+        self.model = model
+        self.vectorizer = vectorizer
+        self.token = token
+        self.version = get_model_version(model)
+        self.batcher = batcher
+        self.loaded_at = time.time()
+        self.leases = 0
+        self.retired = False
+
+    def close(self) -> None:
+        if self.batcher is not None:
+            self.batcher.close()
+
+
+class ModelReloader:
+    """
+    Holds the ServingModel that requests use and swaps in new versions.
+
+    A background thread polls the source every poll_interval seconds. When
+    the source reports a new version it is loaded and warmed on that
+    thread, off the request path, and then swapped in under a lock.
+    Requests hold a lease() on the model they started with. A replaced model
+    keeps serving its in-flight requests, and its batcher is closed when the
+    last lease is released. If a load fails, the current model stays in
+    place.
+    """
+
+    def __init__(self, source, make_batcher=None, poll_interval: float = 30.0):
+        self.source = source
+        self.make_batcher = make_batcher
+        self.poll_interval = poll_interval
+        self.reloads = 0
+        self.failed_reloads = 0
+        self._current = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def current(self) -> ServingModel:
+        return self._current
+
+    def _load(self, token: str) -> ServingModel:
+        started = time.perf_counter()
+        model, vectorizer = self.source.load(token)
+        predict_sentiment(WARMUP_COMMENTS, model, vectorizer)
+        batcher = self.make_batcher(model, vectorizer) if self.make_batcher is not None else None
+        serving = ServingModel(model, vectorizer, token, batcher)
+        logger.info(f"Loaded and warmed model {serving.version} in {time.perf_counter() - started:.2f}s")
+        return serving
+
+    def load_initial(self) -> ServingModel:
+        """Load the source's current version; called once before serving."""
+        self._current = self._load(self.source.probe())
+        return self._current
+
+    def check(self) -> bool:
+        """Load and swap in the source's version if it changed; True on a swap."""
+        token = self.source.probe()
+        if self._current is not None and token == self._current.token:
+            return False
+
+        serving = self._load(token)
+        with self._lock:
+            previous, self._current = self._current, serving
+            close_previous = False
+            if previous is not None:
+                previous.retired = True
+                close_previous = previous.leases == 0
+        if close_previous:
+            previous.close()
+        self.reloads += 1
+        logger.info(f"Now serving model {serving.version} (was {previous.version if previous else None})")
+        return True
+
+    @contextlib.contextmanager
+    def lease(self):
+        """The current ServingModel, kept usable until the block exits even if replaced."""
+        with self._lock:
+            serving = self._current
+            serving.leases += 1
+        try:
+            yield serving
+        finally:
+            with self._lock:
+                serving.leases -= 1
+                close = serving.retired and serving.leases == 0
+            if close:
+                serving.close()
+
+    def _run(self, check_now: bool = False) -> None:
+        while check_now or not self._stop.wait(self.poll_interval):
+            check_now = False
+            try:
+                self.check()
+            except Exception as e:
+                self.failed_reloads += 1
+                logger.error(f"Model reload failed, keeping {self._current.version}: {e}")
+
+    def start(self, check_now: bool = False) -> None:
+        """Start the poller; with check_now it checks once before its first wait."""
+        if self._thread is None and self.poll_interval > 0:
+            self._thread = threading.Thread(
+                target=self._run, args=(check_now,), name="model-reloader", daemon=True
+            )
+            self._thread.start()
+
+    def after_fork(self) -> None:
+        """
+        Call in a worker forked from a process that loaded the model: threads
+        do not survive fork(), so the batcher and the poller are started anew.
+        The parent may be serving an older model than its other workers (the
+        gunicorn master never polls), so the poller checks straight away.
+        """
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        serving = self._current
+        if serving is not None and self.make_batcher is not None:
+            serving.batcher = self.make_batcher(serving.model, serving.vectorizer)
+        self.start(check_now=True)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        serving = self._current
+        return {
+            "model_version": serving.version if serving else None,
+            "loaded_at": serving.loaded_at if serving else None,
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+        }
@@ -0,0 +1,103 @@
+# src/utils/nltk_resources.py
+
+import os
+import time
+import logging
+import argparse
+
+import nltk
+
+# Logger setup
+logger = logging.getLogger("nltk_resources")
+logger.setLevel(logging.INFO)
+
+if not logger.handlers:
+    console_handler = logging.StreamHandler()
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    console_handler.setFormatter(formatter)
+    logger.addHandler(console_handler)
+
+# Repo-local data directory, populated at build time (see main() / Dockerfile)
+REPO_NLTK_DATA = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../nltk_data")
+)
+
+# Resource name -> nltk.data path
+RESOURCES = {
+    "stopwords": "corpora/stopwords",
+    "wordnet": "corpora/wordnet",
+}
+
+
+def configure_data_path() -> list:
+    """
+    Put the bundled data directories ahead of NLTK's defaults: NLTK_DATA_DIR
+    if set, then the repo-local nltk_data/. Returns the search path.
+    """
+    for directory in (REPO_NLTK_DATA, os.getenv("NLTK_DATA_DIR")):
+        if directory and directory not in nltk.data.path:
+            nltk.data.path.insert(0, directory)
+    return nltk.data.path
+
+
+def missing_resources() -> list:
+    """Names of required resources that cannot be found locally."""
+    missing = []
+    for name, path in RESOURCES.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            missing.append(name)
+    return missing
+
+
+def ensure_resources(download: bool = False, download_dir: str = REPO_NLTK_DATA) -> None:
+    """
+    Make sure stopwords and WordNet resolve from local data. Never touches
+    the network unless download=True, and then only for missing resources.
+    """
+    configure_data_path()
+    missing = missing_resources()
+    if not missing:
+        return
+
+    if not download:
+        raise LookupError(
+            f"NLTK resources not found locally: {missing}. "
+            f"Run 'python src/utils/nltk_resources.py' to install them into {download_dir}."
+        )
+
+    os.makedirs(download_dir, exist_ok=True)
+    for name in missing:
+        logger.info(f"Downloading NLTK resource '{name}' into {download_dir}")
+        if not nltk.download(name, download_dir=download_dir, quiet=True):
+            raise LookupError(f"Failed to download NLTK resource '{name}'")
+
+
+def warm_wordnet() -> float:
+    """
+    Load the WordNet corpus eagerly so the first request does not pay for it.
+    Returns the time taken in seconds.
+    """
+    from nltk.corpus import wordnet
+    from nltk.stem import WordNetLemmatizer
+
+    started = time.perf_counter()
+    wordnet.ensure_loaded()
+    WordNetLemmatizer().lemmatize("videos")
+    elapsed = time.perf_counter() - started
+    logger.info(f"WordNet warmed in {elapsed:.3f}s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Install the NLTK data this project needs into a local directory.")
+    parser.add_argument("--target", default=REPO_NLTK_DATA, help="Directory to download the NLTK data into")
+    args = parser.parse_args()
+
+    ensure_resources(download=True, download_dir=args.target)
+    logger.info(f"NLTK resources available: {list(RESOURCES)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+# src/utils/parallel.py
+
+import os
+
+
+def resolve_workers(n_jobs: int) -> int:
+    """Translate an n_jobs setting (-1 = all cores) into a worker count."""
+    cpus = os.cpu_count() or 1
+    if n_jobs is None or n_jobs == 0:
+        return 1
+    return cpus if n_jobs < 0 else min(n_jobs, cpus)
@@ -0,0 +1,90 @@
+# src/utils/prediction_cache.py
+
+import hashlib
+import logging
+import threading
+
+from src.utils.cache import TTLCache, SQLiteCache
+
+logger = logging.getLogger("prediction_cache")
+
+_MISSING = object()
+
+
+def _to_builtin(value):
+    """Convert numpy scalars to plain Python values so they serialize to JSON."""
+    return value.item() if hasattr(value, "item") else value
+
+
+class PredictionCache:
+    """
+    Content-addressed cache of sentiment predictions.
+
+    Keys are a SHA-256 of the model version and the cleaned comment text, so
+    the same normalized comment maps to one entry per model version. Lookups
+    go to a bounded in-memory LRU+TTL cache first and then, if sqlite_path is
+    given, to a SQLite file that survives restarts.
+    """
+
+    def __init__(self, max_entries: int = 100000, ttl_seconds: float = 24 * 3600, sqlite_path: str = None):
+        self.memory = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.disk = SQLiteCache(sqlite_path, ttl_seconds=ttl_seconds, table="predictions") if sqlite_path else None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(cleaned: str, model_version: str) -> str:
+        return hashlib.sha256(f"{model_version}\0{cleaned}".encode("utf-8")).hexdigest()
+
+    def get_many(self, cleaned_comments: list, model_version: str) -> dict:
+        """Return {cleaned_comment: prediction} for the comments already cached."""
+        keys = {self.make_key(c, model_version): c for c in cleaned_comments}
+        found = {}
+        missing_keys = []
+        for key, cleaned in keys.items():
+            value = self.memory.get(key, _MISSING)
+            if value is _MISSING:
+                missing_keys.append(key)
+            else:
+                found[cleaned] = value
+
+        disk_found = {}
+        if self.disk is not None and missing_keys:
+            disk_found = self.disk.get_many(missing_keys)
+            for key, value in disk_found.items():
+                self.memory.set(key, value)
+                found[keys[key]] = value
+
+        with self._lock:
+            self.hits += len(found) - len(disk_found)
+            self.disk_hits += len(disk_found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, predictions: dict, model_version: str) -> None:
+        """Store {cleaned_comment: prediction} for a model version."""
+        items = {self.make_key(c, model_version): _to_builtin(p) for c, p in predictions.items()}
+        for key, value in items.items():
+            self.memory.set(key, value)
+        if self.disk is not None and items:
+            try:
+                self.disk.set_many(items)
+            except Exception as e:
+                logger.error(f"Failed to persist predictions to SQLite: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+        stats["memory"] = self.memory.stats()
+        if self.disk is not None:
+            stats["disk_entries"] = len(self.disk)
+        return stats
+
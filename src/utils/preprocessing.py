@@ -1,10 +1,13 @@
 # src/utils/preprocessing.py
 
+import os
 import re
+import string
 import logging
-import nltk
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
+from src.utils.lemmatization import LemmaCache, load_lemma_table, DEFAULT_TABLE_PATH
+from src.utils.nltk_resources import ensure_resources
 
 # Logging configuration
 logger = logging.getLogger("preprocessing")
@@ -25,28 +28,82 @@ if not logger.handlers:
     logger.addHandler(console_handler)
     logger.addHandler(file_handler)
 
-# Download NLTK data if not found
-try:
-    nltk.data.find("corpora/stopwords")
-except LookupError:
-    nltk.download("stopwords")
+# Resolve NLTK data from local directories only; never download at import time
+ensure_resources(download=False)
 
-try:
-    nltk.data.find("corpora/wordnet")
-except LookupError:
-    nltk.download("wordnet")
+# Version of the cleaning rules below. Bump it whenever preprocess_comment's output
+# changes: serving bundles record it and refuse to load under a different version.
+PREPROCESSING_VERSION = 1
 
 # Stopwords and lemmatizer setup
 stop_words = set(stopwords.words("english")) - {"not", "no", "but", "however", "yet"}
 lemmatizer = WordNetLemmatizer()
 
+# Precomputed lemma table + bounded memo in front of WordNet
+lemma_cache = LemmaCache(
+    table=load_lemma_table(os.getenv("LEMMA_TABLE_PATH", DEFAULT_TABLE_PATH)),
+    lemmatizer=lemmatizer,
+)
+
+# Translate table for the single cleaning pass: after lowercasing and dropping
+# non-ASCII characters, delete every byte outside [A-Za-z0-9\s!?.,]. The kept
+# whitespace is exactly what str.split() splits on, so no regex is needed.
+_KEPT_BYTES = set(
+    string.ascii_letters + string.digits + "!?.,"
+    + "".join(chr(i) for i in range(128) if chr(i).isspace())
+)
+_DELETE_BYTES = bytes(i for i in range(128) if chr(i) not in _KEPT_BYTES)
+
+
+def clean_tokens(comment: str) -> list:
+    """Cleaned, stopword-filtered tokens of a comment, before lemmatization."""
+    cleaned = comment.lower().encode("ascii", "ignore").translate(None, _DELETE_BYTES).decode("ascii")
+    return [word for word in cleaned.split() if word not in stop_words]
+
+
+def normalize_comment(comment: str) -> str:
+    """
+    Single-pass equivalent of the original cleaning pipeline: lowercase, drop
+    emojis/symbols, strip disallowed characters, then remove stopwords and
+    lemmatize while walking the tokens once.
+    """
+    cleaned = comment.lower().encode("ascii", "ignore").translate(None, _DELETE_BYTES).decode("ascii")
+    lemmatize = lemma_cache.lemmatize
+    return " ".join([lemmatize(word) for word in cleaned.split() if word not in stop_words])
+
+
+def normalize_comments(comments: list) -> list:
+    """Batch version of normalize_comment; falls back per comment on bad input."""
+    normalized = []
+    for comment in comments:
+        try:
+            normalized.append(normalize_comment(comment))
+        except Exception:
+            normalized.append(preprocess_comment(comment))
+    return normalized
+
+
 def preprocess_comment(comment: str) -> str:
     """
     Cleans and normalizes a single comment by removing emojis,
     punctuation, stopwords, and applying lemmatization.
     """
     try:
-        logger.debug(f"Original: {comment}")
+        cleaned = normalize_comment(comment)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Original: %s | Cleaned: %s", comment, cleaned)
+        return cleaned
+    except Exception as e:
+        logger.error(f"Failed to preprocess comment: {comment}. Error: {e}")
+        return _reference_preprocess_comment(comment)
+
+
+def _reference_preprocess_comment(comment: str) -> str:
+    """
+    The original multi-pass implementation, kept as the reference that
+    normalize_comment must match byte for byte.
+    """
+    try:
         comment = comment.lower()
         comment = comment.strip()
         comment = comment.encode("ascii", "ignore").decode("ascii")  # Removes emojis & symbols
@@ -54,19 +111,45 @@ def preprocess_comment(comment: str) -> str:
         comment = re.sub(r"[^A-Za-z0-9\s!?.,]", "", comment)
         comment = " ".join([word for word in comment.split() if word not in stop_words])
         comment = " ".join([lemmatizer.lemmatize(word) for word in comment.split()])
-        logger.debug(f"Cleaned: {comment}")
         return comment
-    except Exception as e:
-        logger.error(f"Failed to preprocess comment: {comment}. Error: {e}")
+    except Exception:
         return comment
 
+
 def preprocess_comments_list(comments: list) -> list:
     """
     Takes a list of raw comments and returns a list of cleaned comments.
     """
     try:
         logger.info(f"Preprocessing {len(comments)} comment(s)")
-        return [preprocess_comment(c) for c in comments]
+        return normalize_comments(comments)
     except Exception as e:
         logger.error(f"Failed to preprocess comment list. Error: {e}")
         return comments
+
+
+def verify_normalizer_equivalence(comments: list) -> list:
+    """
+    Compare normalize_comments against the reference implementation.
+    Returns the (comment, expected, actual) triples that differ.
+    """
+    mismatches = []
+    for comment, got in zip(comments, normalize_comments(comments)):
+        expected = _reference_preprocess_comment(comment)
+        if expected != got:
+            mismatches.append((comment, expected, got))
+    return mismatches
+
+
+# Equivalence check on a corpus, e.g. the training split
+if __name__ == "__main__":
+    import sys
+    from src.utils.data_io import read_frame
+
+    corpus_path = sys.argv[1] if len(sys.argv) > 1 else "data/raw/train.parquet"
+    corpus = read_frame(corpus_path, columns=["clean_comment"])["clean_comment"].tolist()
+    mismatches = verify_normalizer_equivalence(corpus)
+    print(f"Checked {len(corpus)} comments: {len(mismatches)} mismatch(es)")
+    for comment, expected, got in mismatches[:10]:
+        print(f"{comment!r}\n  expected: {expected!r}\n  got:      {got!r}")
+    sys.exit(1 if mismatches else 0)
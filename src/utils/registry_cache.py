@@ -0,0 +1,232 @@
+# src/utils/registry_cache.py
+
+import os
+import json
+import time
+import pickle
+import shutil
+import logging
+import contextlib
+
+logger = logging.getLogger("registry_cache")
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "youtube_sentiment", "models")
+
+# Written last into a downloaded entry; an entry directory without it is never used
+ENTRY_FILE = "cache_entry.json"
+VECTORIZER_PATTERNS = ("vectorizer.pkl", "tfidf_vectorizer.pkl")
+
+
+@contextlib.contextmanager
+def file_lock(path: str, timeout: float = 600.0, poll_interval: float = 0.1):
+    """Exclusive advisory lock on `path`, shared by all processes on the host."""
+    handle = open(path, "a+b")
+    try:
+        if os.name == "nt":
+            import msvcrt
+
+            def acquire():
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+
+            def release():
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            def acquire():
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+            def release():
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                acquire()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Timed out waiting for lock {path}")
+                time.sleep(poll_interval)
+        try:
+            yield
+        finally:
+            release()
+    finally:
+        handle.close()
+
+
+class RegistryCache:
+    """
+    Local disk cache of registered model versions and their vectorizer.
+
+    Entries live at <root>/<model name>/v<version>-<run_id>. The only
+    registry call on a hit is the stage -> version lookup. A miss downloads
+    into a temporary directory under a per-entry file lock and renames it
+    into place, so concurrent workers download once and readers never see a
+    partial entry. The version last fetched for each stage is recorded under
+    <root>/<model name>/stages, and is what fetch() falls back to when the
+    registry is unreachable.
+    """
+
+    def __init__(self, root: str = None, client=None):
+        from mlflow.tracking import MlflowClient
+
+        self.root = root or os.getenv("MODEL_CACHE_DIR") or DEFAULT_CACHE_DIR
+        self.client = client or MlflowClient()
+
+    def entry_path(self, model_name: str, version: str, run_id: str) -> str:
+        return os.path.join(self.root, model_name, f"v{version}-{run_id}")
+
+    @staticmethod
+    def read_entry(path: str):
+        """The entry metadata of a complete cache entry, or None."""
+        try:
+            with open(os.path.join(path, ENTRY_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def resolve(self, model_name: str, stage: str):
+        """The ModelVersion currently in `stage`."""
+        versions = self.client.get_latest_versions(model_name, stages=[stage])
+        if not versions:
+            raise ValueError(f"No version of {model_name} in stage {stage}.")
+        return versions[0]
+
+    def stage_path(self, model_name: str, stage: str) -> str:
+        return os.path.join(self.root, model_name, "stages", f"{stage}.json")
+
+    def record_stage(self, model_name: str, stage: str, version: str, run_id: str) -> None:
+        """Remember that `stage` resolved to this version, which is cached."""
+        path = self.stage_path(model_name, stage)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        staging_path = f"{path}.tmp-{os.getpid()}"
+        with open(staging_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": str(version),
+                "run_id": run_id,
+                "resolved_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            }, f, indent=4)
+        os.replace(staging_path, path)
+
+    def stage_version(self, model_name: str, stage: str):
+        """(version, run_id) last recorded for `stage` if that entry is cached, else None."""
+        try:
+            with open(self.stage_path(model_name, stage), "r", encoding="utf-8") as f:
+                recorded = json.load(f)
+        except (OSError, ValueError):
+            return None
+        path = self.entry_path(model_name, recorded["version"], recorded["run_id"])
+        if self.read_entry(path) is None:
+            return None
+        return recorded["version"], recorded["run_id"]
+
+    def _download(self, model_version, path: str) -> None:
+        import mlflow
+
+        staging_path = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(staging_path, ignore_errors=True)
+        os.makedirs(staging_path)
+        started = time.perf_counter()
+
+        model_path = mlflow.artifacts.download_artifacts(
+            artifact_uri=f"models:/{model_version.name}/{model_version.version}",
+            dst_path=os.path.join(staging_path, "model"),
+        )
+
+        artifacts = self.client.list_artifacts(model_version.run_id)
+        vectorizer_path = None
+        for pattern in VECTORIZER_PATTERNS:
+            vectorizer_path = next((a.path for a in artifacts if pattern in a.path), None)
+            if vectorizer_path:
+                break
+        if not vectorizer_path:
+            raise ValueError("Vectorizer artifact not found.")
+        vectorizer_path = mlflow.artifacts.download_artifacts(
+            run_id=model_version.run_id,
+            artifact_path=vectorizer_path,
+            dst_path=os.path.join(staging_path, "vectorizer"),
+        )
+
+        with open(os.path.join(staging_path, ENTRY_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                "name": model_version.name,
+                "version": str(model_version.version),
+                "run_id": model_version.run_id,
+                "model_path": os.path.relpath(model_path, staging_path),
+                "vectorizer_path": os.path.relpath(vectorizer_path, staging_path),
+                "downloaded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            }, f, indent=4)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(staging_path, path)
+        logger.info(
+            f"Cached {model_version.name} v{model_version.version} in {path} "
+            f"({time.perf_counter() - started:.2f}s)"
+        )
+
+    def _fetch(self, model_version) -> str:
+        """Path of the cache entry for a ModelVersion, downloading it on a miss."""
+        path = self.entry_path(model_version.name, model_version.version, model_version.run_id)
+        if self.read_entry(path) is not None:
+            logger.info(f"Cache hit for {model_version.name} v{model_version.version}")
+            return path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with file_lock(f"{path}.lock"):
+            # Another worker may have finished the download while we waited
+            if self.read_entry(path) is None:
+                self._download(model_version, path)
+        return path
+
+    def fetch(self, model_name: str, stage: str = "Staging") -> str:
+        """
+        Path of the cache entry for the version currently in `stage`,
+        downloading it on a miss. If the registry cannot be reached, the
+        version last fetched for that stage is served instead, so a rolled
+        back stage keeps its rolled-back version.
+        """
+        try:
+            model_version = self.resolve(model_name, stage)
+        except Exception as e:
+            recorded = self.stage_version(model_name, stage)
+            if recorded is None:
+                raise
+            logger.warning(f"Registry lookup failed ({e}); using cached {model_name} v{recorded[0]} for {stage}")
+            return self.entry_path(model_name, *recorded)
+
+        path = self._fetch(model_version)
+        self.record_stage(model_name, stage, model_version.version, model_version.run_id)
+        return path
+
+    def fetch_version(self, model_name: str, version: str, run_id: str = None) -> str:
+        """
+        Path of the cache entry for one version of a model; a cached entry is
+        used without asking the registry. With run_id, a registry version
+        from another run (e.g. a re-created model) is refused.
+        """
+        if run_id is not None:
+            path = self.entry_path(model_name, version, run_id)
+            if self.read_entry(path) is not None:
+                logger.info(f"Cache hit for {model_name} v{version}")
+                return path
+
+        model_version = self.client.get_model_version(model_name, str(version))
+        if run_id is not None and model_version.run_id != run_id:
+            raise ValueError(
+                f"{model_name} v{version} now belongs to run {model_version.run_id}, expected {run_id}."
+            )
+        return self._fetch(model_version)
+
+    def load(self, path: str) -> tuple:
+        """(pyfunc model, vectorizer) from a cache entry."""
+        import mlflow.pyfunc
+
+        entry = self.read_entry(path)
+        model = mlflow.pyfunc.load_model(os.path.join(path, entry["model_path"]))
+        with open(os.path.join(path, entry["vectorizer_path"]), "rb") as f:
+            vectorizer = pickle.load(f)
+        return model, vectorizer
@@ -0,0 +1,113 @@
+# src/utils/result_store.py
+
+import math
+import uuid
+import logging
+
+from src.utils.cache import TTLCache, SQLiteCache
+
+logger = logging.getLogger("result_store")
+
+# Comments per SQLite row; a page read touches at most ceil(per_page / CHUNK_SIZE) + 1 rows
+CHUNK_SIZE = 100
+
+# Expired rows are deleted from the SQLite file once every this many puts
+PURGE_EVERY = 100
+
+
+class ResultStore:
+    """
+    Server-side store of analysis results, addressed by an opaque result ID.
+
+    Only the ID goes into the (cookie) session, so the request size does not
+    grow with the number of comments. Results are kept in a bounded
+    in-memory LRU+TTL cache and, if sqlite_path is given, in a SQLite file
+    shared by all worker processes. On disk the comments are split into
+    fixed-size chunks, so rendering one page reads a bounded number of rows
+    however long the result is.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 3600, sqlite_path: str = None):
+        self.memory = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.disk = SQLiteCache(sqlite_path, ttl_seconds=ttl_seconds, table="results") if sqlite_path else None
+        self._puts = 0
+
+    def put(self, results: list, sentiment_counts: dict, wordcloud_filename: str = None,
+            model_version: str = None) -> str:
+        """Store (comment, sentiment) results and their summary; returns the result ID."""
+        result_id = uuid.uuid4().hex
+        summary = {
+            "total": len(results),
+            "sentiment_counts": sentiment_counts,
+            "wordcloud_filename": wordcloud_filename,
+            "model_version": model_version,
+        }
+        results = [tuple(row) for row in results]
+        self.memory.set(result_id, (summary, results))
+
+        if self.disk is not None:
+            items = {f"{result_id}:summary": summary}
+            for index, start in enumerate(range(0, len(results), CHUNK_SIZE)):
+                items[f"{result_id}:{index}"] = results[start:start + CHUNK_SIZE]
+            try:
+                self.disk.set_many(items)
+                self._puts += 1
+                if self._puts % PURGE_EVERY == 0:
+                    self.disk.purge_expired()
+            except Exception as e:
+                logger.error(f"Failed to persist result {result_id} to SQLite: {e}")
+        return result_id
+
+    def get_page(self, result_id: str, page: int = 1, per_page: int = 50):
+        """
+        The summary of a result plus one page of its comments, or None if the
+        ID is unknown or expired. Pages are 1-based and clamped to the range.
+        """
+        if not result_id:
+            return None
+        per_page = max(1, per_page)
+
+        entry = self.memory.get(result_id)
+        if entry is not None:
+            summary, results = entry
+        elif self.disk is not None:
+            summary, results = self.disk.get(f"{result_id}:summary"), None
+            if summary is None:
+                return None
+        else:
+            return None
+
+        pages = max(1, math.ceil(summary["total"] / per_page))
+        page = min(max(1, page), pages)
+        start = (page - 1) * per_page
+        stop = min(start + per_page, summary["total"])
+
+        if results is not None:
+            rows = results[start:stop]
+        else:
+            keys = [f"{result_id}:{index}" for index in range(start // CHUNK_SIZE, (stop - 1) // CHUNK_SIZE + 1)]
+            chunks = self.disk.get_many(keys) if stop > start else {}
+            if len(chunks) < len(keys):
+                logger.warning(f"Result {result_id} is missing chunks on disk")
+                return None
+            first = start // CHUNK_SIZE * CHUNK_SIZE
+            rows = [tuple(row) for key in keys for row in chunks[key]][start - first:stop - first]
+
+        return {**summary, "results": rows, "page": page, "pages": pages, "per_page": per_page, "offset": start}
+
+    def delete(self, result_id: str) -> None:
+        if not result_id:
+            return
+        self.memory.delete(result_id)
+        if self.disk is not None:
+            summary = self.disk.get(f"{result_id}:summary")
+            if summary is not None:
+                for index in range(math.ceil(summary["total"] / CHUNK_SIZE)):
+                    self.disk.delete(f"{result_id}:{index}")
+                self.disk.delete(f"{result_id}:summary")
+
+    def stats(self) -> dict:
+        stats = {"memory": self.memory.stats()}
+        if self.disk is not None:
+            stats["disk_entries"] = len(self.disk)
+        return stats
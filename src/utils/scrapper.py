@@ -106,6 +106,61 @@ def get_youtube_comments(youtube_url_or_id, max_comments=100):
         logger.exception("Error occurred while fetching YouTube comments.")
         return []
 
+def fetch_comment_threads(video_id, max_comments=100, newer_than=None):
+    """
+    Fetch top-level comments of a video newest first (order=time).
+
+    Args:
+        video_id (str): YouTube video ID.
+        max_comments (int): Maximum number of comments to fetch.
+        newer_than (str): RFC 3339 publish time; paging stops at the first
+            comment published before it, so only newer comments (and those
+            published at that instant) are returned.
+
+    Returns:
+        tuple: (comments, exhausted). comments is a list of dicts with the
+        comment "id", "text" and "published_at"; exhausted is True when paging
+        stopped before max_comments because there were no more comments or
+        newer_than was reached.
+
+    Unlike get_youtube_comments, errors are raised rather than logged and swallowed.
+    """
+    api_key = os.getenv("YOUTUBE_API_KEY")
+    if not api_key:
+        raise ValueError("YOUTUBE_API_KEY not found in environment variables.")
+
+    youtube = build("youtube", "v3", developerKey=api_key)
+    comments = []
+    next_page_token = None
+
+    while len(comments) < max_comments:
+        response = youtube.commentThreads().list(
+            part="snippet",
+            videoId=video_id,
+            order="time",
+            maxResults=min(100, max_comments - len(comments)),
+            pageToken=next_page_token,
+            textFormat="plainText"
+        ).execute()
+
+        for item in response.get("items", []):
+            snippet = item["snippet"]["topLevelComment"]["snippet"]
+            if newer_than is not None and snippet["publishedAt"] < newer_than:
+                logger.info(f"Fetched {len(comments)} new comments for video ID: {video_id}")
+                return comments, True
+            comments.append({
+                "id": item["snippet"]["topLevelComment"]["id"],
+                "text": snippet["textDisplay"],
+                "published_at": snippet["publishedAt"],
+            })
+
+        next_page_token = response.get("nextPageToken")
+        if not next_page_token:
+            break
+
+    logger.info(f"Fetched {len(comments)} comments for video ID: {video_id}")
+    return comments[:max_comments], len(comments) < max_comments
+
 # Example usage
 if __name__ == "__main__":
     sample_input = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
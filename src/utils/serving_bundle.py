@@ -0,0 +1,327 @@
+# src/utils/serving_bundle.py
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.preprocessing import normalize
+
+from src.utils.text_analyzer import CommentAnalyzer
+from src.utils.tree_ensemble import TreeEnsemble, export_booster
+
+logger = logging.getLogger("serving_bundle")
+
+BUNDLE_FORMAT_VERSION = 1
+
+# File in a bundle root naming the bundle to serve
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+# LightGBM model string of the booster, scored natively when LightGBM is installed
+BOOSTER_FILE = "booster.txt"
+
+
+class BundleVectorizer:
+    """
+    TF-IDF transform over a vocabulary stored as flat arrays: the terms as a
+    sorted fixed-width byte array (looked up with searchsorted), the column of
+    each term, and the IDF weights. Produces the same matrix as the fitted
+    TfidfVectorizer it was exported from.
+    """
+
+    def __init__(self, terms, term_columns, idf, ngram_range: tuple):
+        self.terms = terms
+        self.term_columns = term_columns
+        self.idf = idf
+        self.analyzer = CommentAnalyzer(ngram_range)
+
+    def transform(self, docs):
+        doc_ids, grams = [], []
+        for i, doc in enumerate(docs):
+            doc_grams = self.analyzer(doc)
+            grams.extend(gram.encode("utf-8") for gram in doc_grams)
+            doc_ids.extend([i] * len(doc_grams))
+
+        # Grams longer than the widest term cannot match (and would be truncated)
+        width = self.terms.dtype.itemsize
+        fits = [j for j, gram in enumerate(grams) if len(gram) <= width]
+        queries = np.array([grams[j] for j in fits], dtype=self.terms.dtype)
+        rows = np.array(doc_ids, dtype=np.int64)[fits]
+
+        position = np.minimum(np.searchsorted(self.terms, queries), len(self.terms) - 1)
+        found = self.terms[position] == queries
+        counts = csr_matrix(
+            (np.ones(int(found.sum()), dtype=np.float64), (rows[found], self.term_columns[position[found]])),
+            shape=(len(docs), len(self.idf)),
+        )
+        counts.sum_duplicates()
+        counts.data *= self.idf[counts.indices]
+        return normalize(counts, norm="l2", copy=False)
+
+
+class BundleModel:
+    """
+    The model of a serving bundle, scoring full-width TF-IDF rows.
+
+    With a native LightGBM booster (the default when LightGBM is installed)
+    rows are scored by LightGBM itself, reading only the booster's columns of
+    a pruned model. Otherwise the NumPy TreeEnsemble is used; it gives the
+    same predictions but is several times slower, so it is meant for
+    environments without LightGBM rather than for production serving.
+    """
+
+    def __init__(self, ensemble: TreeEnsemble, manifest: dict, booster=None, booster_columns=None):
+        self.ensemble = ensemble
+        self.manifest = manifest
+        self.n_features = manifest["n_columns"]
+        self.booster = booster
+        self.booster_columns = booster_columns
+        self.classes = np.asarray(ensemble.classes)
+
+    @property
+    def version(self) -> str:
+        return self.manifest["model_version"]
+
+    def predict(self, X):
+        if X.shape[1] != self.n_features:
+            raise ValueError(
+                f"Feature mismatch: Model expects {self.n_features} columns, "
+                f"but got {X.shape[1]}"
+            )
+        if self.booster is None:
+            return self.ensemble.predict(X)
+        X = csr_matrix(X)
+        if self.booster_columns is not None:
+            X = X[:, self.booster_columns]
+        return self.classes[np.argmax(self.booster.predict(X), axis=1)]
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _bundle_checksum(files: dict) -> str:
+    """One checksum over the per-file digests, independent of file order."""
+    return hashlib.sha256(json.dumps(files, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _vectorizer_arrays(vectorizer) -> tuple:
+    """(mode, ngram_range, arrays) for the fitted TF-IDF vectorizer behind a PrunedVectorizer or not."""
+    from src.utils.hashing_features import HashingTfidfVectorizer
+
+    if isinstance(vectorizer, HashingTfidfVectorizer):
+        return "hashing", vectorizer.ngram_range, {"idf": np.asarray(vectorizer.idf_, dtype=np.float64)}
+
+    analyzer = vectorizer.analyzer
+    if isinstance(analyzer, CommentAnalyzer):
+        ngram_range = analyzer.ngram_range
+    elif (analyzer == "word" and vectorizer.lowercase and vectorizer.preprocessor is None
+          and vectorizer.tokenizer is None and vectorizer.stop_words is None
+          and vectorizer.token_pattern == r"(?u)\b\w\w+\b"):
+        # The default word analyzer yields CommentAnalyzer's n-grams on cleaned text
+        ngram_range = tuple(vectorizer.ngram_range)
+    else:
+        raise ValueError("Only vectorizers with CommentAnalyzer or the default word analyzer can be exported.")
+    if (vectorizer.norm, vectorizer.use_idf, vectorizer.sublinear_tf, vectorizer.binary) != ("l2", True, False, False):
+        raise ValueError("Only l2-normalized TF-IDF with raw counts can be exported.")
+
+    terms = sorted(vectorizer.vocabulary_, key=lambda term: term.encode("utf-8"))
+    arrays = {
+        "terms": np.array([term.encode("utf-8") for term in terms]),
+        "term_columns": np.array([vectorizer.vocabulary_[term] for term in terms], dtype=np.int64),
+        "idf": np.asarray(vectorizer.idf_, dtype=np.float64),
+    }
+    return "vocabulary", ngram_range, arrays
+
+
+def export_bundle(model, vectorizer, output_dir: str, model_name: str = None, model_version: str = None) -> str:
+    """
+    Write a serving bundle for a fitted model and vectorizer to
+    output_dir/<model_version> and point output_dir/CURRENT at it.
+
+    The bundle is a directory of .npy arrays (tree ensemble, vocabulary,
+    IDF), the LightGBM model string and a manifest.json with the model and
+    preprocessing versions and a checksum. model_version defaults to the one prediction caches use
+    (MLflow run_id, else a booster hash).
+    Returns the bundle path.
+    """
+    from src.utils.inference import _resolve_lgbm_estimator, get_model_version
+    from src.utils.preprocessing import PREPROCESSING_VERSION
+
+    try:
+        estimator = _resolve_lgbm_estimator(model)
+        if estimator is None:
+            raise ValueError("Serving bundles require a fitted LightGBM classifier.")
+        model_version = model_version or get_model_version(model)
+
+        ensemble = export_booster(estimator.booster_, estimator.classes_)
+        keep = getattr(vectorizer, "keep_", None)
+        if keep is not None:
+            # Pruned models read a subset of the vectorizer's columns; index the full vocabulary instead
+            ensemble.features = keep[ensemble.features]
+            vectorizer = vectorizer.vectorizer
+        mode, ngram_range, arrays = _vectorizer_arrays(vectorizer)
+        arrays.update({f"ensemble_{name}": array for name, array in ensemble.to_arrays().items()})
+        if keep is not None:
+            arrays["booster_columns"] = np.asarray(keep, dtype=np.int64)
+
+        os.makedirs(output_dir, exist_ok=True)
+        bundle_path = os.path.join(output_dir, model_version)
+        staging_path = os.path.join(output_dir, f".{model_version}.tmp-{os.getpid()}")
+        shutil.rmtree(staging_path, ignore_errors=True)
+        os.makedirs(staging_path)
+
+        files = {}
+        for name, array in arrays.items():
+            np.save(os.path.join(staging_path, f"{name}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+            files[f"{name}.npy"] = _file_digest(os.path.join(staging_path, f"{name}.npy"))
+        with open(os.path.join(staging_path, BOOSTER_FILE), "w", encoding="utf-8") as f:
+            f.write(estimator.booster_.model_to_string())
+        files[BOOSTER_FILE] = _file_digest(os.path.join(staging_path, BOOSTER_FILE))
+
+        manifest = {
+            "format_version": BUNDLE_FORMAT_VERSION,
+            "model_name": model_name,
+            "model_version": model_version,
+            "preprocessing_version": PREPROCESSING_VERSION,
+            "feature_mode": mode,
+            "ngram_range": list(ngram_range),
+            "n_columns": int(len(arrays["idf"])),
+            "num_trees": ensemble.num_trees,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "files": files,
+            "checksum": _bundle_checksum(files),
+        }
+        with open(os.path.join(staging_path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=4)
+
+        # Swap the finished directory in, then repoint CURRENT; readers never see a partial bundle
+        shutil.rmtree(bundle_path, ignore_errors=True)
+        os.replace(staging_path, bundle_path)
+        current_tmp = os.path.join(output_dir, f".{CURRENT_FILE}.tmp-{os.getpid()}")
+        with open(current_tmp, "w", encoding="utf-8") as f:
+            f.write(model_version)
+        os.replace(current_tmp, os.path.join(output_dir, CURRENT_FILE))
+
+        logger.info(f"Exported serving bundle {bundle_path} ({mode}, {ensemble.num_trees} trees)")
+        return bundle_path
+    except Exception as e:
+        logger.error(f"Serving bundle export failed: {e}")
+        raise
+
+
+def resolve_bundle_path(path: str) -> str:
+    """A bundle directory, or the one named by CURRENT in a bundle root."""
+    current = os.path.join(path, CURRENT_FILE)
+    if os.path.exists(current):
+        with open(current, "r", encoding="utf-8") as f:
+            return os.path.join(path, f.read().strip())
+    return path
+
+
+def _load_booster(path: str):
+    """The bundle's native LightGBM booster, or None if LightGBM is not installed."""
+    try:
+        import lightgbm as lgb
+    except ImportError:
+        logger.warning("LightGBM is not installed; scoring with the slower NumPy tree ensemble")
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return lgb.Booster(model_str=f.read())
+
+
+def load_bundle(path: str, verify: bool = True, native: bool = True) -> tuple:
+    """
+    Load (BundleModel, vectorizer) from a bundle directory or bundle root.
+
+    Arrays are memory-mapped read-only, so worker processes serving the same
+    bundle share its pages. MLflow is not imported. With native=True (and
+    LightGBM installed) the model scores with the bundle's LightGBM booster;
+    otherwise, or for bundles exported without one, with the NumPy
+    TreeEnsemble. With verify=True the file digests are checked against the
+    manifest.
+    """
+    from src.utils.preprocessing import PREPROCESSING_VERSION
+
+    try:
+        started = time.perf_counter()
+        path = resolve_bundle_path(path)
+        with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        if manifest["format_version"] != BUNDLE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported bundle format {manifest['format_version']} (expected {BUNDLE_FORMAT_VERSION}).")
+        if manifest["preprocessing_version"] != PREPROCESSING_VERSION:
+            raise ValueError(
+                f"Bundle was built for preprocessing version {manifest['preprocessing_version']}, "
+                f"this code is version {PREPROCESSING_VERSION}."
+            )
+        if verify:
+            files = {name: _file_digest(os.path.join(path, name)) for name in manifest["files"]}
+            if files != manifest["files"] or _bundle_checksum(files) != manifest["checksum"]:
+                raise ValueError(f"Checksum mismatch in serving bundle {path}.")
+
+        arrays = {
+            name[:-len(".npy")]: np.load(os.path.join(path, name), mmap_mode="r", allow_pickle=False)
+            for name in manifest["files"] if name.endswith(".npy")
+        }
+        ensemble = TreeEnsemble.from_arrays(
+            {name[len("ensemble_"):]: array for name, array in arrays.items() if name.startswith("ensemble_")}
+        )
+        booster = None
+        if native and BOOSTER_FILE in manifest["files"]:
+            booster = _load_booster(os.path.join(path, BOOSTER_FILE))
+
+        ngram_range = tuple(manifest["ngram_range"])
+        if manifest["feature_mode"] == "hashing":
+            from src.utils.hashing_features import HashingTfidfVectorizer
+
+            vectorizer = HashingTfidfVectorizer(n_features=manifest["n_columns"], ngram_range=ngram_range)
+            vectorizer.idf_ = arrays["idf"]
+        else:
+            vectorizer = BundleVectorizer(arrays["terms"], arrays["term_columns"], arrays["idf"], ngram_range)
+
+        logger.info(
+            f"Loaded serving bundle {manifest['model_version']} from {path} "
+            f"({'LightGBM' if booster is not None else 'NumPy'} scoring) in {time.perf_counter() - started:.3f}s"
+        )
+        return BundleModel(ensemble, manifest, booster, arrays.get("booster_columns")), vectorizer
+    except Exception as e:
+        logger.error(f"Serving bundle loading failed: {e}")
+        raise
+
+
+# Export a bundle from the registry or from local pickles, e.g.
+#   python -m src.utils.serving_bundle --model-name my_model --stage Staging --output bundles
+#   python -m src.utils.serving_bundle --model pruned_lgbm_model.pkl --vectorizer pruned_tfidf_vectorizer.pkl --output bundles
+if __name__ == "__main__":
+    import pickle
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export a self-contained serving bundle.")
+    parser.add_argument("--model-name", help="Registered model to export")
+    parser.add_argument("--stage", default="Staging", help="Registry stage of --model-name")
+    parser.add_argument("--model", help="Pickled LightGBM model (instead of the registry)")
+    parser.add_argument("--vectorizer", help="Pickled vectorizer matching --model")
+    parser.add_argument("--output", default="bundles", help="Bundle root directory")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.model:
+        with open(args.model, "rb") as f:
+            model = pickle.load(f)
+        with open(args.vectorizer, "rb") as f:
+            vectorizer = pickle.load(f)
+    else:
+        from src.utils.inference import load_model_and_artifacts
+        model, vectorizer = load_model_and_artifacts(args.model_name, args.stage)
+
+    print(export_bundle(model, vectorizer, args.output, model_name=args.model_name))
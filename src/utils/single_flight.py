@@ -0,0 +1,102 @@
+# src/utils/single_flight.py
+
+import time
+import logging
+import threading
+
+logger = logging.getLogger("single_flight")
+
+
+class _Call:
+    """One in-flight execution and the callers waiting on it."""
+
+    __slots__ = ("done", "result", "error", "waiters", "started_at", "context")
+
+    def __init__(self, context=None):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+        self.started_at = time.monotonic()
+        self.context = context
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key runs fn; callers arriving while it runs wait
+    for it and get the same result, or the same exception re-raised. Nothing
+    is cached: once the call finishes the next caller runs fn again. Waiters
+    give up with TimeoutError after `timeout` seconds (None waits forever);
+    the running call itself is not interrupted and still completes for the
+    others. A caller that starts a call can attach a context to it (e.g. a
+    progress relay); callers that join get join(context) called first.
+    """
+
+    def __init__(self, timeout: float = None):
+        self.timeout = timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    def do(self, key, fn, timeout: float = None, context=None, join=None):
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call(context)
+                leader = True
+                self.executions += 1
+            else:
+                call.waiters += 1
+                leader = False
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                # Not just Exception: waiters must never mistake an interrupted call for a None result
+                call.error = e
+                with self._lock:
+                    self.errors += 1
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+            if call.waiters:
+                logger.info(f"Shared result of {key} with {call.waiters} coalesced caller(s)")
+        else:
+            if join is not None:
+                join(call.context)
+            timeout = self.timeout if timeout is None else timeout
+            if not call.done.wait(timeout):
+                with self._lock:
+                    self.timeouts += 1
+                raise TimeoutError(f"Timed out after {timeout}s waiting for in-flight call {key}")
+            if call.error is not None and not isinstance(call.error, Exception):
+                raise RuntimeError(f"In-flight call {key} was interrupted: {call.error!r}") from call.error
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "in_flight": len(self._calls),
+            }
@@ -0,0 +1,123 @@
+# src/utils/text_analyzer.py
+
+import re
+import logging
+from collections import Counter
+
+logger = logging.getLogger("text_analyzer")
+
+# TfidfVectorizer's default token_pattern
+_TOKEN_RE = re.compile(r"(?u)\b\w\w+\b")
+
+
+class CommentAnalyzer:
+    """
+    Analyzer for the TF-IDF vectorizers that goes from a comment to its
+    1..n-grams in one pass over the words.
+
+    Raw comments (tokens()) are cleaned, stopword-filtered, lemmatized and
+    split into vectorizer tokens word by word, so the cleaned string is never
+    built and re-scanned. As a vectorizer analyzer it accepts either such a
+    token list or already-cleaned text (the data/interim clean_comment
+    column), and produces the same n-grams as TfidfVectorizer's default word
+    analyzer on the cleaned text.
+    """
+
+    def __init__(self, ngram_range: tuple = (1, 1)):
+        self.ngram_range = tuple(ngram_range)
+        self._subtokens = {}
+
+    def _split(self, word: str) -> list:
+        """Vectorizer tokens of one whitespace-separated word, memoized."""
+        parts = self._subtokens.get(word)
+        if parts is None:
+            parts = _TOKEN_RE.findall(word)
+            if len(self._subtokens) < 1_000_000:
+                self._subtokens[word] = parts
+        return parts
+
+    def _text_tokens(self, text: str) -> list:
+        """Vectorizer tokens of already-cleaned text."""
+        split = self._split
+        return [token for word in text.lower().split() for token in split(word)]
+
+    def tokens(self, comment: str) -> list:
+        """Vectorizer tokens of a raw comment, with the preprocessing steps inline."""
+        from src.utils.preprocessing import stop_words, lemma_cache, preprocess_comment, _DELETE_BYTES
+
+        try:
+            cleaned = comment.lower().encode("ascii", "ignore").translate(None, _DELETE_BYTES).decode("ascii")
+        except Exception:
+            return self._text_tokens(preprocess_comment(comment))
+        lemmatize = lemma_cache.lemmatize
+        split = self._split
+        tokens = []
+        for word in cleaned.split():
+            if word not in stop_words:
+                tokens.extend(split(lemmatize(word)))
+        return tokens
+
+    def ngrams(self, tokens: list) -> list:
+        min_n, max_n = self.ngram_range
+        grams = list(tokens) if min_n == 1 else []
+        count = len(tokens)
+        for n in range(max(min_n, 2), min(max_n, count) + 1):
+            grams.extend(" ".join(tokens[i:i + n]) for i in range(count - n + 1))
+        return grams
+
+    def __call__(self, doc) -> list:
+        if isinstance(doc, str):
+            doc = self._text_tokens(doc)
+        return self.ngrams(doc)
+
+    def __getstate__(self):
+        # The memo is rebuilt on demand; keep pickled vectorizers small
+        return {"ngram_range": self.ngram_range}
+
+    def __setstate__(self, state):
+        self.__init__(state["ngram_range"])
+
+
+def text_analyzer(vectorizer):
+    """The CommentAnalyzer behind a (possibly wrapped) vectorizer, or None."""
+    for attr in ("vectorizer", "hasher"):
+        inner = getattr(vectorizer, attr, None)
+        if inner is not None:
+            return text_analyzer(inner)
+    analyzer = getattr(vectorizer, "analyzer", None)
+    return analyzer if isinstance(analyzer, CommentAnalyzer) else None
+
+
+def verify_analyzer_equivalence(comments: list, ngram_range: tuple = (1, 3)) -> list:
+    """
+    Compare the fused path (raw comment -> n-grams) against the two-stage
+    path (preprocess_comment, then TfidfVectorizer's default analyzer).
+    Returns the (comment, expected, actual) n-gram counts that differ.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from src.utils.preprocessing import preprocess_comment
+
+    reference = TfidfVectorizer(ngram_range=ngram_range).build_analyzer()
+    analyzer = CommentAnalyzer(ngram_range)
+    mismatches = []
+    for comment in comments:
+        expected = Counter(reference(preprocess_comment(comment)))
+        fused = Counter(analyzer(analyzer.tokens(comment)))
+        cleaned = Counter(analyzer(preprocess_comment(comment)))
+        if fused != expected or cleaned != expected:
+            mismatches.append((comment, expected, fused))
+    return mismatches
+
+
+# Equivalence check on a corpus, e.g. the training split
+if __name__ == "__main__":
+    import sys
+    from src.utils.data_io import read_frame
+
+    corpus_path = sys.argv[1] if len(sys.argv) > 1 else "data/raw/train.parquet"
+    corpus = read_frame(corpus_path, columns=["clean_comment"])["clean_comment"].dropna().astype(str).tolist()
+    mismatches = verify_analyzer_equivalence(corpus)
+    print(f"Checked {len(corpus)} comments: {len(mismatches)} mismatch(es)")
+    for comment, expected, got in mismatches[:10]:
+        print(f"{comment!r}\n  expected: {sorted(expected.elements())!r}\n  got:      {sorted(got.elements())!r}")
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,290 @@
+# src/utils/tree_ensemble.py
+
+import time
+import logging
+
+import numpy as np
+from scipy.sparse import csr_matrix, issparse
+
+logger = logging.getLogger("tree_ensemble")
+
+# LightGBM missing-value handling of a numerical split
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+_MISSING_TYPES = {"None": MISSING_NONE, "Zero": MISSING_ZERO, "NaN": MISSING_NAN}
+
+# |x| at or below this counts as zero for MissingType::Zero (LightGBM's kZeroThreshold)
+ZERO_THRESHOLD = 1e-35
+
+# Rows scored per block, bounding the dense (rows x used features) buffer
+BLOCK_ROWS = 4096
+
+
+class TreeEnsemble:
+    """
+    A LightGBM multiclass booster flattened into NumPy arrays, with a
+    vectorized evaluator that needs neither LightGBM nor MLflow.
+
+    Internal nodes of all trees share one set of arrays (split feature,
+    threshold, children, default direction, missing type); a child index
+    below zero refers to leaf ~index in leaf_value. Split features are
+    renumbered to the columns in `features`, the only ones any tree reads.
+    """
+
+    ARRAYS = (
+        "features", "roots", "split_feature", "threshold", "left_child", "right_child",
+        "default_left", "missing_type", "leaf_value",
+    )
+
+    def __init__(self, features, roots, split_feature, threshold, left_child, right_child,
+                 default_left, missing_type, leaf_value, num_class: int, classes):
+        self.features = features
+        self.roots = roots
+        self.split_feature = split_feature
+        self.threshold = threshold
+        self.left_child = left_child
+        self.right_child = right_child
+        self.default_left = default_left
+        self.missing_type = missing_type
+        self.leaf_value = leaf_value
+        self.num_class = int(num_class)
+        self.classes = np.asarray(classes)
+        self._zero_leaf, self._zero_path = self._zero_paths()
+
+        # Features whose splits all have missing type None take NaN as 0, which is
+        # done once per block; nodes on any other feature need the full rule
+        plain = np.ones(len(self.features), dtype=bool)
+        plain[self.split_feature[self.missing_type != MISSING_NONE]] = False
+        self._plain_columns = np.flatnonzero(plain)
+        self._special = None if plain.all() else ~plain[self.split_feature]
+
+    @property
+    def num_trees(self) -> int:
+        return len(self.roots)
+
+    def to_arrays(self) -> dict:
+        """All arrays plus metadata, e.g. for np.savez."""
+        arrays = {name: getattr(self, name) for name in self.ARRAYS}
+        arrays["num_class"] = np.array([self.num_class])
+        arrays["classes"] = self.classes
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "TreeEnsemble":
+        return cls(*(arrays[name] for name in cls.ARRAYS), num_class=int(arrays["num_class"][0]),
+                   classes=arrays["classes"])
+
+    def _go_left(self, node, fval) -> np.ndarray:
+        """LightGBM's numerical decision at each node for the feature values given."""
+        missing = self.missing_type[node]
+        fval = np.where(np.isnan(fval) & (missing != MISSING_NAN), 0.0, fval)
+        use_default = ((missing == MISSING_ZERO) & (np.abs(fval) <= ZERO_THRESHOLD)) | (
+            (missing == MISSING_NAN) & np.isnan(fval)
+        )
+        return np.where(use_default, self.default_left[node], fval <= self.threshold[node])
+
+    def _zero_paths(self) -> tuple:
+        """
+        The leaf an all-zero row reaches in each tree, and a (trees x features)
+        indicator of the features split on along that path. A row whose
+        nonzero features miss a tree's path lands in that tree's zero leaf.
+        """
+        zero_child = np.where(
+            self._go_left(np.arange(len(self.threshold)), np.zeros(len(self.threshold))),
+            self.left_child, self.right_child,
+        ).tolist()
+        split_feature = self.split_feature.tolist()
+        zero_leaf = np.empty(self.num_trees, dtype=np.int64)
+        indptr, indices = [0], []
+        for tree, node in enumerate(self.roots.tolist()):
+            path = set()
+            while node >= 0:
+                path.add(split_feature[node])
+                node = zero_child[node]
+            zero_leaf[tree] = ~node
+            indices.extend(sorted(path))
+            indptr.append(len(indices))
+        zero_path = csr_matrix(
+            (np.ones(len(indices), dtype=np.int32), np.array(indices, dtype=np.int64), np.array(indptr)),
+            shape=(self.num_trees, len(self.features)),
+        )
+        return zero_leaf, zero_path
+
+    def _dense_block(self, X, start: int, stop: int) -> np.ndarray:
+        """Rows [start, stop) restricted to the used features, as a dense float64 array."""
+        if issparse(X):
+            return X[start:stop][:, self.features].toarray().astype(np.float64, copy=False)
+        return np.asarray(X[start:stop], dtype=np.float64)[:, self.features]
+
+    def raw_score(self, X) -> np.ndarray:
+        """Sum of leaf values per class, shape (n_rows, num_class)."""
+        if issparse(X):
+            X = csr_matrix(X)
+        n_rows = X.shape[0]
+        scores = np.zeros((n_rows, self.num_class), dtype=np.float64)
+
+        for start in range(0, n_rows, BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, n_rows)
+            values = self._dense_block(X, start, stop)
+            values[:, self._plain_columns] = np.nan_to_num(values[:, self._plain_columns], nan=0.0)
+
+            # Only (row, tree) pairs where the row has a feature on the zero path are walked
+            leaf = np.tile(self._zero_leaf, (stop - start, 1))
+            hits = (csr_matrix(values != 0, dtype=np.int32) @ self._zero_path.T).tocoo()
+            rows, trees = hits.row, hits.col
+            pair = np.arange(len(rows))
+            node = self.roots[trees]
+            offset = rows * values.shape[1]
+            flat = values.ravel()
+            reached = np.empty(len(rows), dtype=np.int64)
+
+            # Walk the remaining pairs down one level per step, dropping those at a leaf
+            while len(pair):
+                fval = flat[offset + self.split_feature[node]]
+                go_left = fval <= self.threshold[node]
+                if self._special is not None:
+                    special = np.flatnonzero(self._special[node])
+                    go_left[special] = self._go_left(node[special], fval[special])
+                node = np.where(go_left, self.left_child[node], self.right_child[node])
+                done = node < 0
+                reached[pair[done]] = ~node[done]
+                pending = ~done
+                pair, node, offset = pair[pending], node[pending], offset[pending]
+            leaf[rows, trees] = reached
+
+            # Trees are stored iteration by iteration, one per class
+            scores[start:stop] = self.leaf_value[leaf].reshape(stop - start, -1, self.num_class).sum(axis=1)
+        return scores
+
+    def predict_proba(self, X) -> np.ndarray:
+        scores = self.raw_score(X)
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes[np.argmax(self.raw_score(X), axis=1)]
+
+
+def export_booster(booster, classes) -> TreeEnsemble:
+    """Flatten a trained multiclass LightGBM booster into a TreeEnsemble."""
+    dump = booster.dump_model()
+    if not dump["objective"].startswith("multiclass"):
+        raise ValueError(f"Only multiclass (softmax) boosters can be exported, got {dump['objective']!r}.")
+    num_class = dump["num_class"]
+
+    split_feature, threshold, left_child, right_child = [], [], [], []
+    default_left, missing_type, leaf_value, roots = [], [], [], []
+
+    def visit(node: dict) -> int:
+        if "leaf_value" in node:
+            leaf_value.append(node["leaf_value"])
+            return ~(len(leaf_value) - 1)
+        if node["decision_type"] != "<=":
+            raise ValueError(f"Unsupported split type {node['decision_type']!r}; only numerical splits are exported.")
+        index = len(split_feature)
+        split_feature.append(node["split_feature"])
+        threshold.append(node["threshold"])
+        default_left.append(node["default_left"])
+        missing_type.append(_MISSING_TYPES[node["missing_type"]])
+        left_child.append(0)
+        right_child.append(0)
+        left_child[index] = visit(node["left_child"])
+        right_child[index] = visit(node["right_child"])
+        return index
+
+    for tree in dump["tree_info"]:
+        roots.append(visit(tree["tree_structure"]))
+
+    # Renumber split features to the columns actually used
+    features, split_feature = np.unique(np.array(split_feature, dtype=np.int64), return_inverse=True)
+
+    ensemble = TreeEnsemble(
+        features=features,
+        roots=np.array(roots, dtype=np.int32),
+        split_feature=split_feature.astype(np.int32),
+        threshold=np.array(threshold, dtype=np.float64),
+        left_child=np.array(left_child, dtype=np.int32),
+        right_child=np.array(right_child, dtype=np.int32),
+        default_left=np.array(default_left, dtype=bool),
+        missing_type=np.array(missing_type, dtype=np.int8),
+        leaf_value=np.array(leaf_value, dtype=np.float64),
+        num_class=num_class,
+        classes=classes,
+    )
+    logger.info(
+        f"Exported {ensemble.num_trees} trees ({len(threshold)} splits, {len(leaf_value)} leaves) "
+        f"over {len(features)} features"
+    )
+    return ensemble
+
+
+def benchmark(model, vectorizer, comments: list, batch_sizes=(1, 100, 10000), repeats: int = 5) -> list:
+    """
+    Latency of scoring vectorized batches with the exported ensemble, the
+    LightGBM booster and, if the model is an MLflow pyfunc, the pyfunc path.
+    Checks along the way that the ensemble's labels match LightGBM's.
+    """
+    from src.utils.inference import get_sparse_scorer, _predict_dense
+
+    scorer = get_sparse_scorer(model)
+    ensemble = export_booster(scorer.booster, scorer.classes)
+    has_pyfunc = hasattr(model, "metadata")
+
+    results = []
+    for batch_size in batch_sizes:
+        batch = (comments * (batch_size // max(len(comments), 1) + 1))[:batch_size]
+        X = vectorizer.transform(batch)
+
+        expected = scorer.predict(X)
+        got = ensemble.predict(X)
+        if not np.array_equal(expected, got):
+            raise AssertionError(f"Ensemble disagrees with LightGBM on {int(np.sum(expected != got))} rows")
+
+        paths = {"numpy": ensemble.predict, "lightgbm": scorer.predict}
+        if has_pyfunc:
+            paths["pyfunc"] = lambda X: _predict_dense(model, X)
+        row = {"batch_size": batch_size}
+        for name, predict in paths.items():
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                predict(X)
+                timings.append(time.perf_counter() - started)
+            row[f"{name}_ms"] = 1000 * float(np.median(timings))
+        results.append(row)
+        logger.info(f"Benchmark: {row}")
+    return results
+
+
+# Export check and latency benchmark on a trained model, e.g.
+#   python src/utils/tree_ensemble.py lgbm_model.pkl tfidf_vectorizer.pkl data/interim/test_processed.parquet
+if __name__ == "__main__":
+    import sys
+    import pickle
+    from src.utils.data_io import read_frame
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    model_path, vectorizer_path, corpus_path = sys.argv[1:4]
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+    with open(vectorizer_path, "rb") as f:
+        vectorizer = pickle.load(f)
+    corpus = read_frame(corpus_path, columns=["clean_comment"])["clean_comment"].fillna("").astype(str).tolist()
+
+    # Serve the pickled estimator through pyfunc the way the registry does
+    import tempfile
+    import pandas as pd
+    import mlflow.pyfunc
+    import mlflow.sklearn
+    from mlflow.models import infer_signature
+
+    with tempfile.TemporaryDirectory() as tmp:
+        example = pd.DataFrame(vectorizer.transform(corpus[:5]).toarray(),
+                               columns=[str(name) for name in vectorizer.get_feature_names_out()])
+        mlflow.sklearn.save_model(model, f"{tmp}/model", signature=infer_signature(example, model.predict(example.values)))
+        model = mlflow.pyfunc.load_model(f"{tmp}/model")
+        results = benchmark(model, vectorizer, corpus)
+
+    for row in results:
+        print(", ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}" for k, v in row.items()))
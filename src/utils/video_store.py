@@ -0,0 +1,168 @@
+# src/utils/video_store.py
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger("video_store")
+
+SENTIMENTS = ("Positive", "Negative", "Neutral")
+
+
+class VideoStore:
+    """
+    Per-video store of fetched comments and their predicted sentiment, in
+    SQLite (":memory:" keeps it per process, and a forked worker starts
+    with an empty store).
+
+    For each video it keeps the comment IDs, texts, publish times and
+    sentiments, the newest publish time seen (the high-water mark for the
+    next incremental fetch), whether all of the video's comments have been
+    fetched, the model version that scored them and running sentiment
+    counts, which merge() updates with only the comments it inserts.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pid = None
+        self._connection = None
+        with self._lock:
+            self._conn
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # A connection must not be shared across fork(); each process opens its own.
+        # The schema is created per connection: a forked ":memory:" store starts empty.
+        if self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            with connection:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS videos (video_id TEXT PRIMARY KEY, model_version TEXT, "
+                    "high_water TEXT, complete INTEGER NOT NULL, counts TEXT NOT NULL, "
+                    "wordcloud_key TEXT, wordcloud TEXT, updated_at REAL)"
+                )
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS comments (video_id TEXT NOT NULL, comment_id TEXT NOT NULL, "
+                    "text TEXT NOT NULL, published_at TEXT NOT NULL, sentiment TEXT NOT NULL, "
+                    "PRIMARY KEY (video_id, comment_id))"
+                )
+                connection.execute(
+                    "CREATE INDEX IF NOT EXISTS comments_by_time ON comments (video_id, published_at)"
+                )
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, video_id: str):
+        """The stored state of a video, or None if it was never analyzed."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT model_version, high_water, complete, counts, wordcloud_key, wordcloud "
+                "FROM videos WHERE video_id = ?", (video_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        counts = json.loads(row[3])
+        return {
+            "video_id": video_id,
+            "model_version": row[0],
+            "high_water": row[1],
+            "complete": bool(row[2]),
+            "counts": counts,
+            "comment_count": sum(counts.values()),
+            "wordcloud_key": row[4],
+            "wordcloud": row[5],
+        }
+
+    def _rows(self, query: str, params: tuple) -> list:
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [
+            {"id": comment_id, "text": text, "published_at": published_at, "sentiment": sentiment}
+            for comment_id, text, published_at, sentiment in rows
+        ]
+
+    def newest(self, video_id: str, limit: int = None) -> list:
+        """Stored comments of a video, newest first, at most `limit` of them."""
+        return self._rows(
+            "SELECT comment_id, text, published_at, sentiment FROM comments WHERE video_id = ? "
+            "ORDER BY published_at DESC, comment_id DESC LIMIT ?",
+            (video_id, -1 if limit is None else limit),
+        )
+
+    def known_ids(self, video_id: str, comment_ids: list) -> set:
+        """The subset of comment_ids already stored for a video."""
+        known = set()
+        with self._lock:
+            for start in range(0, len(comment_ids), 500):
+                chunk = comment_ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                known.update(row[0] for row in self._conn.execute(
+                    f"SELECT comment_id FROM comments WHERE video_id = ? AND comment_id IN ({placeholders})",
+                    (video_id, *chunk),
+                ))
+        return known
+
+    def merge(self, video_id: str, comments: list, model_version: str, complete: bool,
+              replace: bool = False) -> None:
+        """
+        Add scored comments (dicts with id, text, published_at, sentiment) to a
+        video and fold the ones not already stored into its counts. With
+        replace=True the video's stored comments are dropped first, e.g. when
+        they were scored by another model version.
+        """
+        with self._lock, self._conn:
+            # Take the write lock before reading the counts, so merges from other processes cannot interleave
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = None if replace else self._conn.execute(
+                "SELECT high_water, counts FROM videos WHERE video_id = ?", (video_id,)
+            ).fetchone()
+            if replace:
+                self._conn.execute("DELETE FROM comments WHERE video_id = ?", (video_id,))
+            high_water, counts = (row[0], json.loads(row[1])) if row else (None, dict.fromkeys(SENTIMENTS, 0))
+
+            inserted = 0
+            for comment in comments:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO comments (video_id, comment_id, text, published_at, sentiment) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (video_id, comment["id"], comment["text"], comment["published_at"], comment["sentiment"]),
+                )
+                if cursor.rowcount:
+                    inserted += 1
+                    counts[comment["sentiment"]] = counts.get(comment["sentiment"], 0) + 1
+                    if high_water is None or comment["published_at"] > high_water:
+                        high_water = comment["published_at"]
+
+            # A cached word cloud no longer matches once comments were added
+            self._conn.execute(
+                "INSERT INTO videos (video_id, model_version, high_water, complete, counts, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (video_id) DO UPDATE SET "
+                "model_version = excluded.model_version, high_water = excluded.high_water, "
+                "complete = excluded.complete, counts = excluded.counts, updated_at = excluded.updated_at"
+                + (", wordcloud_key = NULL, wordcloud = NULL" if inserted or replace else ""),
+                (video_id, model_version, high_water, int(complete), json.dumps(counts), time.time()),
+            )
+        logger.info(f"Stored {inserted} new comment(s) for video {video_id}")
+
+    def set_wordcloud(self, video_id: str, key: str, filename: str) -> None:
+        """Remember the word cloud rendered for a video's comments as described by `key`."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE videos SET wordcloud_key = ?, wordcloud = ? WHERE video_id = ?", (key, filename, video_id)
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            videos = self._conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+            comments = self._conn.execute("SELECT COUNT(*) FROM comments").fetchone()[0]
+        return {"videos": videos, "comments": comments}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
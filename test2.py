@@ -15,6 +15,7 @@ from nltk.stem import WordNetLemmatizer
 from mlflow.tracking import MlflowClient
 import matplotlib.dates as mdates
 import pickle
+from src.utils.inference import get_sparse_scorer
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -97,11 +98,8 @@ def predict_with_timestamps():
         # Transform comments using the vectorizer
         transformed_comments = vectorizer.transform(preprocessed_comments)
 
-        # Convert the sparse matrix to dense format
-        dense_comments = transformed_comments.toarray()  # Convert to dense array
-        
-        # Make predictions
-        predictions = model.predict(dense_comments).tolist()  # Convert to list
+        # Score the sparse matrix directly with the LightGBM booster
+        predictions = get_sparse_scorer(model).predict(transformed_comments).tolist()  # Convert to list
         
         # Convert predictions to strings for consistency
         predictions = [str(pred) for pred in predictions]
@@ -131,11 +129,8 @@ def predict():
         # Transform comments using the vectorizer
         transformed_comments = vectorizer.transform(preprocessed_comments)
 
-        # Convert the sparse matrix to dense format
-        dense_comments = transformed_comments.toarray()  # Convert to dense array
-        
-        # Make predictions
-        predictions = model.predict(dense_comments).tolist()  # Convert to list
+        # Score the sparse matrix directly with the LightGBM booster
+        predictions = get_sparse_scorer(model).predict(transformed_comments).tolist()  # Convert to list
         
         # Convert predictions to strings for consistency
         # predictions = [str(pred) for pred in predictions]
@@ -0,0 +1,14 @@
+# tests/conftest.py
+
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Run the tests against the repository's src package
+sys.path.insert(0, ROOT_DIR)
+
+# Modules open their log files relative to the working directory at import; keep them out of the tree
+os.chdir(tempfile.mkdtemp(prefix="yt-sentiment-tests-"))
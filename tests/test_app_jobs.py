@@ -0,0 +1,111 @@
+# tests/test_app_jobs.py
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from conftest import FIXTURES_DIR
+from src.utils.jobs import JobManager, DONE
+from src.utils.preprocessing import preprocess_comment
+from src.utils.serving_bundle import export_bundle
+
+URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+def load_sample() -> list:
+    return pd.read_csv(os.path.join(FIXTURES_DIR, "comments_sample.csv"), keep_default_na=False)[
+        "clean_comment"
+    ].tolist()
+
+
+@pytest.fixture(scope="module")
+def app_module(tmp_path_factory):
+    """app.py serving a small bundle trained on the sample comments."""
+    pytest.importorskip("googleapiclient")
+    texts = [preprocess_comment(comment) for comment in load_sample()] * 4
+    vectorizer = TfidfVectorizer(max_features=100)
+    model = lgb.LGBMClassifier(n_estimators=5, min_child_samples=2, verbose=-1).fit(
+        vectorizer.fit_transform(texts), np.arange(len(texts)) % 3 - 1
+    )
+    bundle_root = str(tmp_path_factory.mktemp("bundles"))
+    export_bundle(model, vectorizer, bundle_root, model_version="test")
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("SERVING_BUNDLE", bundle_root)
+        mp.setenv("MODEL_RELOAD_INTERVAL", "0")
+        import app
+    app.wordcloud_dir = str(tmp_path_factory.mktemp("wordclouds"))
+    return app
+
+
+def fake_source(texts: list):
+    """fetch_comments over `texts`, where comment k was published k seconds in, newest first."""
+    comments = [
+        {"id": f"c{k}", "text": text, "published_at": f"2024-01-01T00:{k // 60:02d}:{k % 60:02d}Z"}
+        for k, text in enumerate(texts)
+    ][::-1]
+
+    def fetch_comments(video_id, max_comments, newer_than=None):
+        newer = [c for c in comments if newer_than is None or c["published_at"] > newer_than]
+        return newer[:max_comments], len(newer) <= max_comments
+
+    return fetch_comments
+
+
+def run_job(manager: JobManager, fn, **params) -> list:
+    """Run fn as a job and return every snapshot it reported, in order."""
+    release = threading.Event()
+    manager.submit(lambda job: release.wait())  # holds the only worker until the listener is attached
+    job = manager.submit(fn, **params)
+    snapshots = []
+    job._listeners.append(lambda j: snapshots.append(j.snapshot()))
+    release.set()
+    for _ in manager.watch(job.id, timeout=30):
+        pass
+    return snapshots
+
+
+def stages(snapshots: list) -> list:
+    seen = []
+    for snapshot in snapshots:
+        if not seen or seen[-1] != snapshot["stage"]:
+            seen.append(snapshot["stage"])
+    return seen
+
+
+def test_job_reports_stages_progress_and_counts(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "JOB_CHUNK_SIZE", 10)
+    manager = JobManager(max_workers=1)
+    texts = load_sample()[:25]
+
+    snapshots = run_job(manager, app_module.analyze_video, url=URL, max_comments=25,
+                        fetch_comments=fake_source(texts))
+
+    final = snapshots[-1]
+    assert final["state"] == DONE, final["error"]
+    assert stages(snapshots) == [None, "fetching", "scoring", "rendering", None]
+    scoring = [s for s in snapshots if s["stage"] == "scoring"]
+    progress = [s["progress"]["done"] for s in scoring]
+    assert progress == sorted(progress) and set(progress) == {0, 10, 20, 25}
+    # Nothing was stored yet, so the partial counts cover exactly the comments scored so far
+    assert all(sum(s["counts"].values()) == s["progress"]["done"] for s in scoring)
+    assert sum(final["counts"].values()) == 25
+
+    page = app_module.result_store.get_page(final["result"]["result_id"], per_page=100)
+    assert page["total"] == 25
+    assert page["sentiment_counts"] == final["counts"]
+    assert page["model_version"] == final["result"]["model_version"] == "test"
+
+    # Five more comments later: only those are scored, the counts cover all 30
+    snapshots = run_job(manager, app_module.analyze_video, url=URL, max_comments=30,
+                        fetch_comments=fake_source(load_sample()[:30]))
+    final = snapshots[-1]
+    assert final["state"] == DONE, final["error"]
+    assert [s["progress"] for s in snapshots if s["stage"] == "scoring"][-1] == {"done": 5, "total": 5}
+    assert sum(final["counts"].values()) == 30
+    manager.shutdown()
@@ -0,0 +1,70 @@
+# tests/test_batching.py
+
+import threading
+import time
+
+import pytest
+
+from src.utils.batching import MicroBatcher
+
+
+class Interrupted(BaseException):
+    pass
+
+
+def submit_on_thread(batcher: MicroBatcher, items: list) -> tuple:
+    """Run batcher.submit(items) on a thread; returns (thread, outcome dict)."""
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = batcher.submit(items, timeout=10)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, outcome
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_interrupted_batch_fails_every_waiting_request():
+    predicting, release = threading.Event(), threading.Event()
+
+    def predict(items):
+        predicting.set()
+        release.wait(10)
+        raise Interrupted()
+
+    batcher = MicroBatcher(predict, max_wait_ms=0)
+    first, first_outcome = submit_on_thread(batcher, ["a"])
+    assert predicting.wait(10)
+    queued, queued_outcome = submit_on_thread(batcher, ["b"])
+    deadline = time.time() + 10
+    while batcher._queue.qsize() == 0 and time.time() < deadline:
+        time.sleep(0.01)
+
+    release.set()
+    first.join(10)
+    queued.join(10)
+    batcher._worker.join(10)  # the interrupt ends the batcher thread
+
+    assert isinstance(first_outcome["error"], RuntimeError)
+    assert isinstance(first_outcome["error"].__cause__, Interrupted)
+    assert str(queued_outcome["error"]) == "MicroBatcher is closed"
+    with pytest.raises(RuntimeError, match="closed"):
+        batcher.submit(["c"], timeout=10)
+
+
+def test_close_flushes_queued_requests_and_rejects_new_ones():
+    batcher = MicroBatcher(lambda items: [item.upper() for item in items], max_wait_ms=50)
+    threads = [submit_on_thread(batcher, [str(k)]) for k in range(5)]
+    batcher.close(timeout=10)
+    for thread, _ in threads:
+        thread.join(10)
+
+    # Each request was either flushed before the stop or rejected, never left waiting
+    for k, (_, outcome) in enumerate(threads):
+        assert outcome.get("result") == [str(k)] or str(outcome.get("error")) == "MicroBatcher is closed"
+    with pytest.raises(RuntimeError, match="closed"):
+        batcher.submit(["x"])
@@ -0,0 +1,56 @@
+# tests/test_data_io.py
+
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src.utils.data_io import FrameWriter, read_frame
+
+
+def chunk(comments: list, categories: list) -> pd.DataFrame:
+    return pd.DataFrame({"clean_comment": pd.Series(comments, dtype=object), "category": categories})
+
+
+@pytest.mark.parametrize("extension", ["parquet", "csv"])
+def test_empty_first_chunk_does_not_fix_the_schema(tmp_path, extension):
+    path = str(tmp_path / f"train.{extension}")
+    with FrameWriter(path) as writer:
+        writer.write(chunk([], []))
+        writer.write(chunk(["great video", "awful"], [1, -1]))
+        writer.write(chunk([], []))
+        writer.write(chunk(["okay"], [0]))
+
+    df = read_frame(path)
+    assert writer.rows == 3
+    assert df["clean_comment"].tolist() == ["great video", "awful", "okay"]
+    assert df["category"].tolist() == [1, -1, 0]
+
+
+def test_only_empty_chunks_still_write_the_columns(tmp_path):
+    path = str(tmp_path / "test.parquet")
+    with FrameWriter(path) as writer:
+        writer.write(chunk([], []))
+
+    assert list(read_frame(path).columns) == ["clean_comment", "category"]
+
+
+def test_explicit_schema(tmp_path):
+    path = str(tmp_path / "test.parquet")
+    schema = pa.schema([("clean_comment", pa.string()), ("category", pa.int64())])
+    with FrameWriter(path, schema=schema):
+        pass
+
+    assert pq.read_schema(path).equals(schema)
+
+
+def test_partial_file_removed_on_error(tmp_path):
+    path = str(tmp_path / "train.parquet")
+    with pytest.raises(RuntimeError):
+        with FrameWriter(path) as writer:
+            writer.write(chunk(["great video"], [1]))
+            raise RuntimeError("source went away")
+
+    assert not os.path.exists(path)
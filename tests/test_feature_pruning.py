@@ -0,0 +1,22 @@
+# tests/test_feature_pruning.py
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from src.utils.feature_pruning import PrunedVectorizer
+
+TEXTS = ["great video loved it", "awful video", "okay i guess", "loved the music great editing"]
+
+
+def test_pruned_vectorizer_leaves_the_original_untouched():
+    vectorizer = TfidfVectorizer(max_features=5).fit(TEXTS)
+    # Set by scikit-learn < 1.7 to the terms cut by max_features
+    vectorizer.stop_words_ = {"okay", "guess"}
+    keep = np.array([0, 3])
+
+    pruned = PrunedVectorizer(vectorizer, keep)
+
+    assert hasattr(vectorizer, "stop_words_")
+    assert not hasattr(pruned.vectorizer, "stop_words_")
+    expected = vectorizer.transform(TEXTS)[:, keep].toarray()
+    np.testing.assert_array_equal(pruned.transform(TEXTS).toarray(), expected)
@@ -0,0 +1,37 @@
+# tests/test_feature_store.py
+
+import numpy as np
+import lightgbm as lgb
+
+from src.utils.feature_store import load_watermark, model_fingerprint, save_watermark
+
+
+def train_booster(seed: int) -> lgb.Booster:
+    rng = np.random.default_rng(seed)
+    X, y = rng.random((60, 4)), rng.integers(0, 2, 60)
+    return lgb.train({"objective": "binary", "verbose": -1}, lgb.Dataset(X, label=y), num_boost_round=3)
+
+
+def test_fingerprint_survives_a_model_string_round_trip():
+    booster = train_booster(0)
+    copy = lgb.Booster(model_str=booster.model_to_string())
+    assert model_fingerprint(copy) == model_fingerprint(booster)
+    assert model_fingerprint(train_booster(1)) != model_fingerprint(booster)
+
+
+def test_watermark_is_reset_for_another_model(tmp_path):
+    path = str(tmp_path / "train_watermark.npz")
+    trained_on = model_fingerprint(train_booster(0))
+    save_watermark(path, np.array([3, 1, 2, 1], dtype=np.uint64), trained_on)
+
+    assert load_watermark(path, trained_on).tolist() == [1, 2, 3]
+    assert load_watermark(path, model_fingerprint(train_booster(1))) is None
+    assert load_watermark(path).tolist() == [1, 2, 3]
+
+
+def test_untagged_watermark_is_reset(tmp_path):
+    path = str(tmp_path / "train_watermark.npz")
+    with open(path, "wb") as f:
+        np.savez(f, hashes=np.array([1, 2], dtype=np.uint64))
+
+    assert load_watermark(path, model_fingerprint(train_booster(0))) is None
@@ -0,0 +1,44 @@
+# tests/test_model_reloader.py
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from conftest import FIXTURES_DIR
+from src.utils.model_reloader import ModelReloader, BundleSource
+from src.utils.preprocessing import preprocess_comment
+from src.utils.serving_bundle import export_bundle
+
+
+def train(n_estimators: int) -> tuple:
+    comments = pd.read_csv(os.path.join(FIXTURES_DIR, "comments_sample.csv"), keep_default_na=False)[
+        "clean_comment"
+    ].tolist()
+    texts = [preprocess_comment(comment) for comment in comments] * 4
+    vectorizer = TfidfVectorizer(max_features=100)
+    model = lgb.LGBMClassifier(n_estimators=n_estimators, min_child_samples=2, verbose=-1).fit(
+        vectorizer.fit_transform(texts), np.arange(len(texts)) % 3 - 1
+    )
+    return model, vectorizer
+
+
+def test_after_fork_checks_before_the_first_poll_interval(tmp_path):
+    bundle_root = str(tmp_path)
+    export_bundle(*train(3), bundle_root, model_version="v1")
+    reloader = ModelReloader(BundleSource(bundle_root), poll_interval=3600)
+    reloader.load_initial()
+
+    # Another worker reloaded after this process loaded v1
+    export_bundle(*train(5), bundle_root, model_version="v2")
+    reloader.after_fork()
+    deadline = time.time() + 30
+    while reloader.current.version != "v2" and time.time() < deadline:
+        time.sleep(0.05)
+    reloader.stop()
+
+    assert reloader.current.version == "v2"
+    assert reloader.reloads == 1
@@ -0,0 +1,45 @@
+# tests/test_preprocessing.py
+
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import FIXTURES_DIR, ROOT_DIR
+from src.utils.preprocessing import (
+    normalize_comment,
+    normalize_comments,
+    preprocess_comment,
+    verify_normalizer_equivalence,
+    _reference_preprocess_comment,
+)
+
+TRAIN_CORPUS = os.path.join(ROOT_DIR, "data", "raw", "train.parquet")
+
+
+def load_sample() -> list:
+    return pd.read_csv(os.path.join(FIXTURES_DIR, "comments_sample.csv"), keep_default_na=False)[
+        "clean_comment"
+    ].tolist()
+
+
+def test_normalizer_matches_reference_on_sample():
+    assert verify_normalizer_equivalence(load_sample()) == []
+
+
+@pytest.mark.skipif(not os.path.exists(TRAIN_CORPUS), reason="training corpus not pulled (dvc repro data_ingestion)")
+def test_normalizer_matches_reference_on_training_corpus():
+    from src.utils.data_io import read_frame
+
+    corpus = read_frame(TRAIN_CORPUS, columns=["clean_comment"])["clean_comment"].dropna().astype(str).tolist()
+    assert verify_normalizer_equivalence(corpus) == []
+
+
+def test_batch_and_single_comment_agree():
+    sample = load_sample()
+    assert normalize_comments(sample) == [normalize_comment(comment) for comment in sample]
+
+
+def test_bad_input_falls_back_per_comment():
+    assert normalize_comments(["Great video", None]) == [normalize_comment("Great video"), None]
+    assert preprocess_comment(None) == _reference_preprocess_comment(None)
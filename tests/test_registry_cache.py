@@ -0,0 +1,111 @@
+# tests/test_registry_cache.py
+
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+mlflow = pytest.importorskip("mlflow")
+
+from mlflow.tracking import MlflowClient  # noqa: E402
+from sklearn.dummy import DummyClassifier  # noqa: E402
+
+from src.utils.registry_cache import RegistryCache  # noqa: E402
+
+MODEL_NAME = "my_model"
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """A file-based MLflow tracking store and registry, and a function registering a version."""
+    tracking_uri = (tmp_path / "mlruns").as_uri()
+    previous_uri = mlflow.get_tracking_uri()
+    mlflow.set_tracking_uri(tracking_uri)
+    client = MlflowClient(tracking_uri)
+
+    def register(label: int) -> str:
+        vectorizer_path = tmp_path / "tfidf_vectorizer.pkl"
+        with open(vectorizer_path, "wb") as f:
+            pickle.dump({"label": label}, f)
+        with mlflow.start_run() as run:
+            model = DummyClassifier(strategy="constant", constant=label).fit(np.zeros((2, 1)), [label, label])
+            mlflow.sklearn.log_model(model, "lgbm_model")
+            mlflow.log_artifact(str(vectorizer_path))
+        return str(mlflow.register_model(f"runs:/{run.info.run_id}/lgbm_model", MODEL_NAME).version)
+
+    yield client, register
+    mlflow.set_tracking_uri(previous_uri)
+
+
+def move(client, version: str, stage: str) -> None:
+    client.transition_model_version_stage(MODEL_NAME, version, stage)
+
+
+def served_version(cache: RegistryCache) -> str:
+    return cache.read_entry(cache.fetch(MODEL_NAME, "Staging"))["version"]
+
+
+def registry_down(*args, **kwargs):
+    raise ConnectionError("registry unreachable")
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_offline_fallback_serves_the_version_last_fetched_for_the_stage(tmp_path, registry, monkeypatch):
+    client, register = registry
+    cache = RegistryCache(root=str(tmp_path / "cache"), client=client)
+
+    first = register(0)
+    move(client, first, "Staging")
+    assert served_version(cache) == first
+
+    second = register(1)
+    move(client, second, "Staging")
+    move(client, first, "Archived")
+    assert served_version(cache) == second
+
+    # Roll back: the older version is in Staging again, the newer one is demoted
+    move(client, first, "Staging")
+    move(client, second, "Archived")
+    assert served_version(cache) == first
+
+    monkeypatch.setattr(client, "get_latest_versions", registry_down)
+    assert served_version(cache) == first
+    model, vectorizer = cache.load(cache.fetch(MODEL_NAME, "Staging"))
+    assert vectorizer == {"label": 0}
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_offline_without_a_recorded_stage_raises(tmp_path, registry, monkeypatch):
+    client, register = registry
+    cache = RegistryCache(root=str(tmp_path / "cache"), client=client)
+
+    move(client, register(0), "Production")
+    cache.fetch(MODEL_NAME, "Production")
+
+    monkeypatch.setattr(client, "get_latest_versions", registry_down)
+    with pytest.raises(ConnectionError):
+        cache.fetch(MODEL_NAME, "Staging")
+    assert os.path.exists(cache.stage_path(MODEL_NAME, "Production"))
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_registry_source_loads_the_probed_version_and_probes_offline(tmp_path, registry, monkeypatch):
+    from src.utils.model_reloader import RegistrySource
+
+    client, register = registry
+    monkeypatch.setenv("MLFLOW_SERVER_TRACKING_URI_EC2", mlflow.get_tracking_uri())
+    monkeypatch.setenv("MODEL_CACHE_DIR", str(tmp_path / "cache"))
+    source = RegistrySource(MODEL_NAME)
+
+    first = register(0)
+    move(client, first, "Staging")
+    token = source.probe()
+
+    # The stage moves on between probe() and load(); load() still returns the probed version
+    move(client, register(1), "Staging")
+    _, vectorizer = source.load(token)
+    assert vectorizer == {"label": 0}
+
+    monkeypatch.setattr(source.cache.client, "get_latest_versions", registry_down)
+    assert source.probe() == token
@@ -0,0 +1,39 @@
+# tests/test_serving_bundle.py
+
+import os
+
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from conftest import FIXTURES_DIR
+from src.utils.preprocessing import preprocess_comment
+from src.utils.serving_bundle import export_bundle, load_bundle
+
+
+@pytest.fixture(scope="module")
+def trained():
+    comments = pd.read_csv(os.path.join(FIXTURES_DIR, "comments_sample.csv"), keep_default_na=False)[
+        "clean_comment"
+    ].tolist()
+    texts = [preprocess_comment(comment) for comment in comments] * 4
+    labels = np.arange(len(texts)) % 3 - 1
+
+    vectorizer = TfidfVectorizer(max_features=100)
+    X = vectorizer.fit_transform(texts)
+    model = lgb.LGBMClassifier(n_estimators=5, min_child_samples=2, verbose=-1).fit(X, labels)
+    return model, vectorizer, texts
+
+
+@pytest.mark.parametrize("native", [True, False])
+def test_bundle_predicts_like_the_model(tmp_path, trained, native):
+    model, vectorizer, texts = trained
+    export_bundle(model, vectorizer, str(tmp_path), model_version="v1")
+
+    bundle_model, bundle_vectorizer = load_bundle(str(tmp_path), native=native)
+
+    assert (bundle_model.booster is not None) == native
+    expected = model.predict(vectorizer.transform(texts))
+    np.testing.assert_array_equal(bundle_model.predict(bundle_vectorizer.transform(texts)), expected)
@@ -0,0 +1,77 @@
+# tests/test_single_flight.py
+
+import threading
+
+import pytest
+
+from src.utils.jobs import Job, ProgressRelay
+from src.utils.single_flight import SingleFlight
+
+
+class Interrupted(BaseException):
+    pass
+
+
+def start_leader(flights: SingleFlight, fn, **kwargs) -> tuple:
+    """Run flights.do("k", fn) on a thread; returns (thread, outcome dict)."""
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = flights.do("k", fn, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, outcome
+
+
+def test_waiters_see_an_interrupted_leader_as_an_error():
+    flights = SingleFlight(timeout=10)
+    running, release = threading.Event(), threading.Event()
+
+    def interrupted():
+        running.set()
+        release.wait(10)
+        raise Interrupted()
+
+    leader, outcome = start_leader(flights, interrupted)
+    assert running.wait(10)
+    threading.Timer(0.1, release.set).start()
+    with pytest.raises(RuntimeError, match="interrupted"):
+        flights.do("k", lambda: "never runs")
+    leader.join()
+
+    assert isinstance(outcome["error"], Interrupted)
+    assert flights.stats()["errors"] == 1
+
+
+def test_joined_job_gets_the_leaders_progress():
+    flights = SingleFlight(timeout=10)
+    relay = ProgressRelay()  # a plain request leads, with no job of its own
+    scored_half, resume = threading.Event(), threading.Event()
+
+    def analysis():
+        relay.update(stage="scoring", progress={"done": 0, "total": 2})
+        relay.update(progress={"done": 1, "total": 2}, counts={"Positive": 1})
+        scored_half.set()
+        resume.wait(10)
+        relay.update(progress={"done": 2, "total": 2}, counts={"Positive": 2})
+        return "result"
+
+    leader, outcome = start_leader(flights, analysis, context=relay)
+    assert scored_half.wait(10), outcome.get("error")
+
+    job = Job("j1", {})
+    seen = []
+    job._listeners.append(lambda j: seen.append(j.snapshot()))
+    threading.Timer(0.1, resume.set).start()
+    assert flights.do("k", lambda: "never runs", join=lambda leading: leading.attach(job)) == "result"
+    leader.join()
+
+    assert outcome["result"] == "result"
+    # Caught up on joining, then every later report
+    assert seen[0]["stage"] == "scoring" and seen[0]["progress"] == {"done": 1, "total": 2}
+    assert job.progress == {"done": 2, "total": 2}
+    assert job.counts == {"Positive": 2}
@@ -0,0 +1,39 @@
+# tests/test_text_analyzer.py
+
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from conftest import FIXTURES_DIR
+from src.utils.preprocessing import preprocess_comment
+from src.utils.text_analyzer import CommentAnalyzer, verify_analyzer_equivalence
+
+
+def load_sample() -> list:
+    return pd.read_csv(os.path.join(FIXTURES_DIR, "comments_sample.csv"), keep_default_na=False)[
+        "clean_comment"
+    ].tolist()
+
+
+def test_analyzer_matches_two_stage_path_on_sample():
+    assert verify_analyzer_equivalence(load_sample()) == []
+
+
+def test_fused_features_match_two_stage_features():
+    sample = load_sample()
+    analyzer = CommentAnalyzer((1, 3))
+
+    # Two-stage: clean the text, then let TfidfVectorizer tokenize it
+    reference = TfidfVectorizer(ngram_range=(1, 3), max_features=200)
+    expected = reference.fit_transform([preprocess_comment(comment) for comment in sample])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        fused = TfidfVectorizer(max_features=200, analyzer=analyzer, token_pattern=None)
+        got = fused.fit_transform([analyzer.tokens(comment) for comment in sample])
+
+    assert fused.vocabulary_ == reference.vocabulary_
+    np.testing.assert_allclose(got.toarray(), expected.toarray())
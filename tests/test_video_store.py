@@ -0,0 +1,58 @@
+# tests/test_video_store.py
+
+import os
+import multiprocessing
+
+import pytest
+
+from src.utils.video_store import VideoStore
+
+fork_only = pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+
+
+def comment(k: int, sentiment: str = "Positive") -> dict:
+    published_at = f"2024-01-01T{k // 3600:02d}:{k // 60 % 60:02d}:{k % 60:02d}Z"
+    return {"id": f"c{k}", "text": f"comment {k}", "published_at": published_at, "sentiment": sentiment}
+
+
+def use_in_child(store: VideoStore) -> None:
+    assert store.get("v1") is None
+    store.merge("v1", [comment(1, "Negative")], "m1", complete=True)
+    assert store.get("v1")["counts"]["Negative"] == 1
+
+
+def merge_many(path: str, offset: int, count: int) -> None:
+    store = VideoStore(path)
+    for k in range(offset, offset + count):
+        store.merge("v1", [comment(k)], "m1", complete=False)
+
+
+@fork_only
+def test_forked_memory_store_has_its_own_schema():
+    store = VideoStore(":memory:")
+    store.merge("v0", [comment(0)], "m1", complete=True)
+
+    child = multiprocessing.get_context("fork").Process(target=use_in_child, args=(store,))
+    child.start()
+    child.join(30)
+
+    assert child.exitcode == 0
+    assert store.get("v1") is None
+    assert store.get("v0")["comment_count"] == 1
+
+
+@fork_only
+def test_concurrent_merges_keep_every_increment(tmp_path):
+    path = str(tmp_path / "videos.db")
+    VideoStore(path)
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=merge_many, args=(path, i * 100, 100)) for i in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+
+    assert [worker.exitcode for worker in workers] == [0, 0, 0, 0]
+    video = VideoStore(path).get("v1")
+    assert video["counts"]["Positive"] == 400
+    assert video["comment_count"] == 400